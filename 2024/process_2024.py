@@ -1,20 +1,47 @@
 import polars as pl
 import os
+import sys
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 raw_csv_path = os.path.join(script_dir, '2024_BRFSS_RAW.csv')
 cleaned_csv_path = os.path.join(script_dir, '2024_BRFSS_CLEANED.csv')
+imputation_stats_path = os.path.join(script_dir, '2024_BRFSS_IMPUTATION_STATS.csv')
 
-v01_2024_df = pl.read_csv(raw_csv_path)
+sys.path.insert(0, os.path.dirname(script_dir))
+from budget import parse_size, print_peak_rss, read_raw_columns
+from compress import check_compression, compressed_path, open_output
+from impute import apply_imputation, impute
+from outliers import detect_outliers, print_counts
+
+# Optional compressed output for distribution: BRFSS_COMPRESSION=gzip|zstd
+compression = os.environ.get('BRFSS_COMPRESSION') or None
+
+# Fail before the cleaning chain runs rather than when the output is opened
+check_compression(compression)
+
+# Optionally keep the survey record key (`_STATE` + `SEQNO`) so cleaned rows can
+# be traced back to the raw file with record_index.py: BRFSS_KEEP_RECORD_KEY=1
+record_key_columns = ["_STATE", "SEQNO"] if os.environ.get('BRFSS_KEEP_RECORD_KEY') == '1' else []
 
 # Extract & rename relevant columns for dataset
 
-v02_2024_df = v01_2024_df.select([
+raw_columns = [
     "SEXVAR", "_AGE_G", "WEIGHT2", "HEIGHT3", "EDUCA", "EMPLOY1", "INCOME3", "MARITAL",
     "PRIMINS2", "PERSDOC3", "MEDCOST1", "CHECKUP1", "GENHLTH", "PHYSHLTH", "MENTHLTH", "POORHLTH",
     "_SMOKER3", "AVEDRNK4", "EXERANY2", "CVDSTRK3", "CVDCRHD4", 
     "DIABETE4"
-    ])
+    ]
+
+# Optional memory budget, e.g. BRFSS_MEMORY_BUDGET=4G: read only the raw columns
+# used here and report the estimated and actual peak against it (see budget.py)
+memory_budget = parse_size(os.environ['BRFSS_MEMORY_BUDGET']) if os.environ.get('BRFSS_MEMORY_BUDGET') else None
+
+if memory_budget:
+    v01_2024_df = read_raw_columns(raw_csv_path, record_key_columns + raw_columns, memory_budget)
+else:
+    v01_2024_df = pl.read_csv(raw_csv_path)
+
+v02_2024_df = v01_2024_df.select([pl.col(c).cast(pl.Int64) for c in record_key_columns] + raw_columns)
 
 new_columns = {
     "SEXVAR" : "SEX", "_AGE_G" : "AGE", "WEIGHT2" : "WGHT (lbs)", "HEIGHT3" : "HGHT (ft)", "EDUCA" : "EDUCATION_LEVEL", 
@@ -408,7 +435,7 @@ v27_2024_df = v26_2024_df.filter(
 
 # Arrange columns properly
 
-v28_2024_df = v27_2024_df.select([
+v28_2024_df = v27_2024_df.select(record_key_columns + [
     "YEAR", "SEX", "AGE", "WGHT (lbs)", "HGHT (ft)", "BMI", "EDUCATION_LEVEL", "EMPLOYMENT_STATUS", "INCOME_LEVEL", "MARITAL_STATUS",
     "INSR_STATUS", "DCTR_STATUS", "COST_STATUS", "CHKP_STATUS", "GEN_HLTH", "PHYS_HLTH_DAYS", "MENT_HLTH_DAYS", "POOR_HLTH_DAYS",
     "SMOK_STATUS", "ALHL_STATUS", "EXER_STATUS", "HAD_STROKE", "HAD_HEARTDISEASE",
@@ -421,6 +448,31 @@ v29_2024_df = v28_2024_df.drop_nulls(subset=[
     "DIABETES_STATUS", "SEX", "AGE", "WGHT (lbs)", "HGHT (ft)", "BMI"
 ])
 
+# Optionally flag or drop height, weight and BMI outliers against robust per-stratum
+# (SEX x AGE) limits in one pass (see outliers.py): BRFSS_OUTLIERS=flag|drop
+
+if os.environ.get('BRFSS_OUTLIERS'):
+    v30_2024_df, outlier_counts = detect_outliers(v29_2024_df, action=os.environ['BRFSS_OUTLIERS'])
+    print_counts(outlier_counts, os.environ['BRFSS_OUTLIERS'])
+else:
+    v30_2024_df = v29_2024_df
+
+# Optionally impute the remaining nulls within YEAR x SEX x AGE strata (see impute.py)
+# BRFSS_IMPUTE=1: fit per-stratum statistics and save them next to the cleaned CSV
+# BRFSS_IMPUTATION_STATS=<csv>: reuse statistics saved from an earlier run or year
+
+if os.environ.get('BRFSS_IMPUTATION_STATS'):
+    v31_2024_df = apply_imputation(v30_2024_df, pl.read_csv(os.environ['BRFSS_IMPUTATION_STATS']))
+elif os.environ.get('BRFSS_IMPUTE') == '1':
+    v31_2024_df, imputation_stats = impute(v30_2024_df)
+    imputation_stats.write_csv(imputation_stats_path)
+else:
+    v31_2024_df = v30_2024_df
+
 # Export cleaned dataframe to CSV
 
-v29_2024_df.write_csv(cleaned_csv_path)
\ No newline at end of file
+with open_output(compressed_path(cleaned_csv_path, compression), compression) as f:
+    v31_2024_df.write_csv(f)
+
+if memory_budget:
+    print_peak_rss(memory_budget)
\ No newline at end of file
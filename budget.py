@@ -0,0 +1,183 @@
+import os
+import re
+import csv
+import sys
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+# Peak memory as a multiple of the estimated in-memory size of the data:
+# pandas holds the parsed chunk plus the formatted CSV text, and the eager
+# cleaning chain keeps a few intermediate frames alive. Measured on 10k-200k
+# record chunks of a 122-column XPT, conversion peaked at 2.9-4.2x (5.8x with
+# the fixed buffers below included at 10k)
+PANDAS_OVERHEAD = 4.0
+POLARS_OVERHEAD = 2.5
+
+# Reader and CSV writer buffers that do not grow with the chunk size
+CHUNK_RESERVE = 32 << 20
+
+# Rough in-memory cost of one string value beyond its characters
+PANDAS_STRING_BYTES = 57
+POLARS_STRING_BYTES = 16
+
+# Peak RSS of the stage scripts on a tiny input: the interpreter plus pandas or
+# polars, before any data is loaded
+PANDAS_BASELINE = 128 << 20
+POLARS_BASELINE = 192 << 20
+
+SAMPLE_ROWS = 1000
+MIN_CHUNK_ROWS = 1000
+
+
+def parse_size(text: str):
+
+    # "4G", "512M", "1.5GB", "2GiB" or a plain number of bytes
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*", str(text), re.IGNORECASE)
+
+    if not match:
+        raise ValueError(f"Invalid memory size {text!r}; expected e.g. 512M or 4G")
+
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(n: float):
+
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+
+    return f"{n:.1f} TB"
+
+
+def xpt_row_bytes(xpt_path: Path):
+
+    # (records, in-memory bytes per record) from the XPORT header alone.
+    # Numeric fields become float64; character fields become Python strings
+    import pandas as pd
+
+    with pd.read_sas(xpt_path, format="xport", encoding="latin1", iterator=True) as reader:
+        row_bytes = sum(
+            8 if field["ntype"] == "numeric" else 8 + PANDAS_STRING_BYTES + field["field_length"]
+            for field in reader.fields
+        )
+        return reader.nobs, row_bytes
+
+
+def csv_row_bytes(csv_path: Path, columns=None, sample_rows: int = SAMPLE_ROWS):
+
+    # (estimated records, in-memory bytes per record) for the given columns,
+    # from the header and the first `sample_rows` lines. Numeric columns cost
+    # 8 bytes; anything else costs its average length plus the string overhead
+    csv_path = Path(csv_path)
+
+    with open(csv_path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("latin1")]))
+        start = f.tell()
+        lines = [line for line in (f.readline() for _ in range(sample_rows)) if line]
+
+    if not lines:
+        return 0, 0
+
+    sample = list(csv.reader(line.decode("latin1") for line in lines))
+    sample_bytes = sum(map(len, lines))
+
+    wanted = [header.index(c) for c in columns if c in header] if columns else range(len(header))
+    row_bytes = 0
+
+    for i in wanted:
+        values = [row[i] for row in sample if i < len(row) and row[i]]
+        try:
+            [float(v) for v in values]
+            row_bytes += 8
+        except ValueError:
+            row_bytes += POLARS_STRING_BYTES + sum(map(len, values)) / len(values)
+
+    # Without a full scan the record count is the file size over the average line
+    rows = int((csv_path.stat().st_size - start) / (sample_bytes / len(sample)))
+
+    return rows, int(row_bytes)
+
+
+def baseline_rss(default: int):
+
+    # Memory in use before any data is loaded: the current RSS, or the typical
+    # baseline if higher, since polars grows its pools after import. Not the
+    # peak, which after one conversion would count that file's data as in use
+    return max(current_rss() or 0, default)
+
+
+def chunk_rows_for(budget: int, row_bytes: int, overhead: float = PANDAS_OVERHEAD, baseline: int = 0):
+
+    # Largest chunk whose peak memory, on top of the baseline and the fixed
+    # buffers, stays within the budget
+    available = budget - baseline - CHUNK_RESERVE
+
+    if not row_bytes or available <= 0:
+        return MIN_CHUNK_ROWS
+
+    return max(MIN_CHUNK_ROWS, int(available / (row_bytes * overhead)))
+
+
+def read_raw_columns(csv_path: Path, columns, budget: int):
+
+    # Reads only `columns`, which is what bounds the cleaning scripts' memory.
+    # Their eager map_elements chain needs the whole frame, so an estimate over
+    # the budget is reported rather than worked around
+    import polars as pl
+
+    rows, row_bytes = csv_row_bytes(csv_path, columns)
+    estimate = baseline_rss(POLARS_BASELINE) + rows * row_bytes * POLARS_OVERHEAD
+    message = (f"Reading {len(columns)} columns of {Path(csv_path).name}: estimated peak "
+               f"~{format_size(estimate)} of {format_size(budget)} budget")
+
+    if estimate > budget:
+        print(f"[WARNING] {message}; the cleaning chain cannot run in less", file=sys.stderr)
+    else:
+        print(f"[INFO] {message}")
+
+    return pl.read_csv(csv_path, columns=columns)
+
+
+def current_rss():
+
+    # Resident set size in bytes right now, where /proc is available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss(children: bool = False):
+
+    # Peak resident set size in bytes, of this process or its largest child
+    if resource is None:
+        return None
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+
+    # ru_maxrss is in kilobytes on Linux but bytes on macOS
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+def print_peak_rss(budget: int, children: bool = False):
+
+    peak = peak_rss(children)
+
+    if peak is None:
+        return
+
+    who = "largest task" if children else "process"
+    message = f"Peak RSS ({who}) {format_size(peak)} of {format_size(budget)} budget ({peak / budget:.0%})"
+
+    if peak > budget:
+        print(f"[WARNING] {message}", file=sys.stderr)
+    else:
+        print(f"[INFO] {message}")
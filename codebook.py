@@ -0,0 +1,296 @@
+import sys
+import json
+import time
+import codecs
+import argparse
+from html.parser import HTMLParser
+from pathlib import Path
+
+CACHE_VERSION = 2
+CHUNK_SIZE = 1 << 16
+ENCODINGS = ("utf-8", "windows-1252")
+
+# Keys of the `Label: ...<br>Section Name: ...` header block above every value table
+HEADER_KEYS = {
+    "Label": "label",
+    "Section Name": "section",
+    "Section Number": "section_number",
+    "Core Section Number": "section_number",
+    "Module Number": "module_number",
+    "Question Number": "question_number",
+    "Column": "column",
+    "Type of Variable": "type",
+    "SAS Variable Name": "name",
+    "Question Prologue": "prologue",
+    "Question": "question",
+}
+
+
+def parse_count(text: str):
+
+    text = text.strip().replace(",", "")
+
+    if not text or text == ".":
+        return None
+
+    try:
+        return float(text) if "." in text else int(text)
+    except ValueError:
+        return None
+
+
+def parse_code(text: str):
+
+    # "1", "9023 - 9352", "BLANK", "HIDDEN"
+    text = text.strip()
+    parts = [p.strip() for p in text.split(" - ")]
+
+    try:
+        bounds = [float(p) if "." in p else int(p) for p in parts]
+    except ValueError:
+        return None, None
+
+    if len(bounds) == 1:
+        return bounds[0], bounds[0]
+    if len(bounds) == 2:
+        return bounds[0], bounds[1]
+
+    return None, None
+
+
+def parse_header(text: str):
+
+    variable = {}
+
+    for line in text.split("\n"):
+        key, sep, value = line.partition(":")
+        if not sep or key.strip() not in HEADER_KEYS:
+            continue
+        variable[HEADER_KEYS[key.strip()]] = value.strip()
+
+    return variable
+
+
+def parse_value(cells):
+
+    label, _, notes = cells[1].partition("\nNotes:")
+    low, high = parse_code(cells[0])
+
+    return {
+        "code": cells[0].strip(),
+        "low": low,
+        "high": high,
+        "label": label.strip(),
+        "notes": notes.strip() or None,
+        "frequency": parse_count(cells[2]),
+        "percentage": parse_count(cells[3]),
+        "weighted_percentage": parse_count(cells[4]),
+    }
+
+
+class CodebookParser(HTMLParser):
+
+    # SAS ODS codebook layout: one <table> per variable, whose <thead> holds a
+    # `linecontent` cell with the header block and whose <tbody> holds one
+    # <tr> of five cells per value code.
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.variables = []
+        self.current = None
+        self.in_header = False
+        self.in_body = False
+        self.row = None
+        self.cell = None
+
+    def handle_starttag(self, tag, attrs):
+
+        if tag == "td" and "linecontent" in (dict(attrs).get("class") or ""):
+            self.in_header = True
+            self.cell = []
+        elif tag == "tbody" and self.current is not None:
+            self.in_body = True
+        elif tag == "tr" and self.in_body:
+            self.row = []
+        elif tag == "td" and self.row is not None:
+            self.cell = []
+        elif tag == "br" and self.cell is not None:
+            self.cell.append("\n")
+
+    def handle_endtag(self, tag):
+
+        if tag == "td" and self.in_header:
+            self.in_header = False
+            header = parse_header("".join(self.cell).replace("\xa0", " "))
+            self.cell = None
+            if "name" in header:
+                header["values"] = []
+                self.current = header
+        elif tag == "td" and self.row is not None and self.cell is not None:
+            self.row.append("".join(self.cell).replace("\xa0", " "))
+            self.cell = None
+        elif tag == "tr" and self.row is not None:
+            if len(self.row) == 5:
+                self.current["values"].append(parse_value(self.row))
+            self.row = None
+        elif tag == "table" and self.current is not None and self.in_body:
+            self.variables.append(self.current)
+            self.current = None
+            self.in_body = False
+
+    def handle_data(self, data):
+
+        if self.cell is not None:
+            self.cell.append(data)
+
+
+def parse_codebook(html_path: Path, encodings=ENCODINGS):
+
+    # The codebooks declare windows-1252 but are written as UTF-8; try each
+    # encoding strictly and start over with the next one on a decode error
+    for encoding in encodings[:-1]:
+        try:
+            return parse_with_encoding(html_path, encoding, errors="strict")
+        except UnicodeDecodeError:
+            print(f"[WARNING] {Path(html_path).name} is not valid {encoding}; retrying as {encodings[-1]}", file=sys.stderr)
+
+    return parse_with_encoding(html_path, encodings[-1], errors="replace")
+
+
+def parse_with_encoding(html_path: Path, encoding: str, errors: str = "strict"):
+
+    parser = CodebookParser()
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+
+    with open(html_path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            parser.feed(decoder.decode(chunk))
+
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+
+    return parser.variables
+
+
+def find_codebook(year_dir: Path):
+
+    html_files = sorted(year_dir.glob("*_CDBK.html"))
+
+    if not html_files:
+        raise FileNotFoundError(f"No *_CDBK.html codebook found in {year_dir}")
+
+    return html_files[0]
+
+
+class Codebook:
+
+    def __init__(self, variables, source=None):
+        self.source = source
+        self.variables = {v["name"].upper(): v for v in variables}
+        self.by_label = {}
+        for v in variables:
+            self.by_label.setdefault(v.get("label", "").lower(), []).append(v["name"])
+
+    def __contains__(self, name):
+        return name.upper() in self.variables
+
+    def __getitem__(self, name):
+        return self.variables[name.upper()]
+
+    def __iter__(self):
+        return iter(self.variables.values())
+
+    def __len__(self):
+        return len(self.variables)
+
+    def get(self, name, default=None):
+        return self.variables.get(name.upper(), default)
+
+    def names(self):
+        return list(self.variables)
+
+    def codes(self, name):
+
+        # Single-valued numeric codes only; ranges such as `1 - 30` are skipped
+        return {
+            v["low"]: v["label"] for v in self[name]["values"]
+            if v["low"] is not None and v["low"] == v["high"]
+        }
+
+    def frequency_table(self, name):
+
+        values = [v for v in self[name]["values"] if v["frequency"] is not None]
+        return [v["code"] for v in values], [v["frequency"] for v in values]
+
+    def check_mapping(self, name, mapping):
+
+        # Compare a cleaning-script mapping dict against the published codes
+        official = set(self.codes(name))
+        mapped = set(mapping)
+
+        return {
+            "unmapped": sorted(official - mapped),
+            "unknown": sorted(mapped - official),
+        }
+
+
+def cache_path_for(html_path: Path):
+    return html_path.with_suffix(".json")
+
+
+def load_codebook(html_path: Path, cache_path: Path = None, refresh: bool = False):
+
+    html_path = Path(html_path)
+    cache_path = Path(cache_path) if cache_path else cache_path_for(html_path)
+    stat = html_path.stat()
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "version": CACHE_VERSION}
+
+    if not refresh and cache_path.exists():
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("source") == fingerprint:
+            return Codebook(cached["variables"], source=html_path)
+
+    variables = parse_codebook(html_path)
+
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"source": fingerprint, "variables": variables}, f)
+    tmp_path.replace(cache_path)
+
+    return Codebook(variables, source=html_path)
+
+
+def main(argv=None):
+
+    arg_parser = argparse.ArgumentParser(description="Extract and query BRFSS codebook variable metadata.")
+    arg_parser.add_argument("codebook", type=Path, help="Codebook HTML file or year directory")
+    arg_parser.add_argument("variables", nargs="*", help="Variable names to print")
+    arg_parser.add_argument("--refresh", action="store_true", help="Re-parse the HTML even if the cache is fresh")
+    args = arg_parser.parse_args(argv)
+
+    html_path = find_codebook(args.codebook) if args.codebook.is_dir() else args.codebook
+
+    start_time = time.perf_counter()
+
+    try:
+        codebook = load_codebook(html_path, refresh=args.refresh)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    duration = time.perf_counter() - start_time
+    print(f"[INFO] Loaded {len(codebook)} variables from {html_path.name} in {duration:.2f} seconds.")
+
+    for name in args.variables:
+        variable = codebook.get(name)
+        if variable is None:
+            print(f"[WARNING] {name} not found in {html_path.name}", file=sys.stderr)
+            continue
+        print(json.dumps(variable, indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
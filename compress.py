@@ -0,0 +1,165 @@
+import io
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BLOCK_SIZE = 4 << 20
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def compress_gzip_block(data: bytes, level: int):
+
+    # Each block becomes a complete gzip member; concatenated members are a
+    # valid gzip stream (RFC 1952) that gunzip, pandas and polars all read
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+class ParallelGzipWriter(io.BufferedIOBase):
+
+    # zlib releases the GIL, so blocks compress concurrently on a thread pool
+    # while the caller keeps producing CSV text
+
+    def __init__(self, raw, level: int = GZIP_LEVEL, threads: int = None, block_size: int = BLOCK_SIZE):
+        self.raw = raw
+        self.level = level
+        self.block_size = block_size
+        self.threads = threads or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=self.threads)
+        self.pending = deque()
+        self.buffer = bytearray()
+        self.mode = "wb"
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        self.buffer += data
+
+        while len(self.buffer) >= self.block_size:
+            self.submit(bytes(self.buffer[:self.block_size]))
+            del self.buffer[:self.block_size]
+
+        return len(data)
+
+    def submit(self, block: bytes):
+
+        self.pending.append(self.pool.submit(compress_gzip_block, block, self.level))
+
+        # Bound memory to a couple of blocks in flight per thread
+        while len(self.pending) > 2 * self.threads:
+            self.raw.write(self.pending.popleft().result())
+
+    def flush(self):
+        if not self.raw.closed:
+            self.raw.flush()
+
+    def close(self):
+
+        if self.closed:
+            return
+
+        try:
+            if self.buffer:
+                self.submit(bytes(self.buffer))
+                self.buffer.clear()
+            while self.pending:
+                self.raw.write(self.pending.popleft().result())
+        finally:
+            self.pool.shutdown()
+            super().close()
+            self.raw.close()
+
+
+def import_zstandard():
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd output requires the `zstandard` package (pip install zstandard)") from None
+
+    return zstandard
+
+
+class ZstdWriter(io.BufferedIOBase):
+
+    def __init__(self, raw, level: int = ZSTD_LEVEL, threads: int = None):
+
+        zstandard = import_zstandard()
+
+        # zstandard runs its own worker threads inside the compressor
+        compressor = zstandard.ZstdCompressor(level=level, threads=threads or -1)
+        self.raw = raw
+        self.stream = compressor.stream_writer(raw, closefd=False)
+        self.mode = "wb"
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        self.stream.write(data)
+        return len(data)
+
+    def flush(self):
+        if not self.stream.closed:
+            self.stream.flush()
+
+    def close(self):
+
+        if self.closed:
+            return
+
+        try:
+            self.stream.close()
+        finally:
+            super().close()
+            self.raw.close()
+
+
+def check_compression(compression: str):
+
+    # Also fails on a missing optional dependency, so callers can check before
+    # doing any work
+    if compression and compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression {compression!r}; expected one of {', '.join(COMPRESSION_SUFFIXES)}")
+    if compression == "zstd":
+        import_zstandard()
+
+
+def compressed_path(path: Path, compression: str = None):
+
+    path = Path(path)
+    check_compression(compression)
+
+    if not compression:
+        return path
+
+    return path.with_name(path.name + COMPRESSION_SUFFIXES[compression])
+
+
+def open_output(path: Path, compression: str = None, threads: int = None):
+
+    # Validate first so an unknown value or a missing zstandard does not leave
+    # an empty file behind
+    check_compression(compression)
+    raw = open(path, "wb")
+
+    if compression == "gzip":
+        return ParallelGzipWriter(raw, threads=threads)
+    if compression == "zstd":
+        return ZstdWriter(raw, threads=threads)
+
+    return raw
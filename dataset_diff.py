@@ -0,0 +1,180 @@
+import sys
+import json
+import time
+import argparse
+import polars as pl
+from pathlib import Path
+
+ROW_INDEX = "__row__"
+ROW_HASH = "__hash__"
+SAMPLE_SIZE = 5
+
+
+def scan(path: Path):
+
+    path = Path(path)
+
+    if path.suffix == ".parquet":
+        return pl.scan_parquet(path)
+
+    return pl.scan_csv(path)
+
+
+def aligned_columns(old_schema, new_schema):
+
+    # A dtype change alone (e.g. Int64 -> Float64 after a mapping rewrite) should
+    # not flag every row, so compare such columns on a common type
+    casts = {}
+
+    for column in old_schema:
+        if column not in new_schema or old_schema[column] == new_schema[column]:
+            continue
+        if old_schema[column].is_numeric() and new_schema[column].is_numeric():
+            casts[column] = pl.Float64
+        else:
+            casts[column] = pl.String
+
+    return [c for c in old_schema if c in new_schema], casts
+
+
+def hashed(lf: pl.LazyFrame, key, columns, casts):
+
+    if not key:
+        lf = lf.with_row_index(ROW_INDEX)
+        key = [ROW_INDEX]
+
+    values = [pl.col(c).cast(casts[c]) if c in casts else pl.col(c) for c in columns if c not in key]
+
+    return lf.select(key + [pl.struct(values).hash(seed=0).alias(ROW_HASH)]), key
+
+
+def diff_datasets(old_path: Path, new_path: Path, key=None, sample_size: int = SAMPLE_SIZE):
+
+    old_lf, new_lf = scan(old_path), scan(new_path)
+    old_schema, new_schema = old_lf.collect_schema(), new_lf.collect_schema()
+
+    missing = [c for c in key or [] if c not in old_schema or c not in new_schema]
+    if missing:
+        raise ValueError(f"Key columns missing from one of the datasets: {', '.join(missing)}")
+
+    columns, casts = aligned_columns(old_schema, new_schema)
+
+    # Pass 1: one 64-bit hash per row, joined on the key. Only key + hash is
+    # held in memory, so this stays small even for full-size years
+    old_hashes, join_key = hashed(old_lf, key, columns, casts)
+    new_hashes, _ = hashed(new_lf, key, columns, casts)
+    old_hashes, new_hashes = pl.collect_all([old_hashes, new_hashes])
+
+    for name, hashes in (("old", old_hashes), ("new", new_hashes)):
+        if key and hashes.select(pl.struct(join_key).is_duplicated().any()).item():
+            raise ValueError(f"Key {', '.join(key)} is not unique in the {name} dataset")
+
+    joined = old_hashes.join(new_hashes, on=join_key, how="full", coalesce=True, suffix="_new").with_columns(
+        pl.when(pl.col(ROW_HASH + "_new").is_null()).then(pl.lit("removed"))
+        .when(pl.col(ROW_HASH).is_null()).then(pl.lit("added"))
+        .when(pl.col(ROW_HASH) != pl.col(ROW_HASH + "_new")).then(pl.lit("changed"))
+        .otherwise(pl.lit("same"))
+        .alias("status")
+    )
+
+    counts = dict(joined.group_by("status").len().iter_rows())
+    changed_keys = joined.filter(pl.col("status") == "changed").select(join_key)
+
+    # Pass 2: only the changed rows are re-read to find which columns differ
+    if not key:
+        old_lf, new_lf = old_lf.with_row_index(ROW_INDEX), new_lf.with_row_index(ROW_INDEX)
+
+    value_columns = [c for c in columns if c not in join_key]
+    old_changed = old_lf.join(changed_keys.lazy(), on=join_key, how="semi").select(
+        join_key + [pl.col(c).cast(casts[c]) if c in casts else pl.col(c) for c in value_columns]
+    )
+    new_changed = new_lf.join(changed_keys.lazy(), on=join_key, how="semi").select(
+        join_key + [pl.col(c).cast(casts[c]) if c in casts else pl.col(c) for c in value_columns]
+    )
+    changed = old_changed.join(new_changed, on=join_key, how="inner", suffix="_new").collect()
+
+    column_changes = changed.select([
+        pl.col(c).ne_missing(pl.col(c + "_new")).sum().alias(c) for c in value_columns
+    ]).row(0, named=True) if changed.height else {}
+
+    samples = {}
+    for column, n_changed in column_changes.items():
+        if not n_changed:
+            continue
+        samples[column] = (
+            changed.filter(pl.col(column).ne_missing(pl.col(column + "_new")))
+            .select(join_key + [pl.col(column).alias("old"), pl.col(column + "_new").alias("new")])
+            .head(sample_size)
+            .to_dicts()
+        )
+
+    return {
+        "key": key or "row position",
+        "rows_old": counts.get("same", 0) + counts.get("changed", 0) + counts.get("removed", 0),
+        "rows_new": counts.get("same", 0) + counts.get("changed", 0) + counts.get("added", 0),
+        "unchanged": counts.get("same", 0),
+        "changed": counts.get("changed", 0),
+        "added": counts.get("added", 0),
+        "removed": counts.get("removed", 0),
+        "columns_added": [c for c in new_schema if c not in old_schema],
+        "columns_removed": [c for c in old_schema if c not in new_schema],
+        "dtype_changes": {c: [str(old_schema[c]), str(new_schema[c])] for c in casts},
+        "column_changes": {c: n for c, n in column_changes.items() if n},
+        "samples": samples,
+        "added_keys": joined.filter(pl.col("status") == "added").select(join_key).head(sample_size).to_dicts(),
+        "removed_keys": joined.filter(pl.col("status") == "removed").select(join_key).head(sample_size).to_dicts(),
+    }
+
+
+def print_report(report):
+
+    print(f"[INFO] Aligned on {report['key']}: {report['rows_old']:,} old rows, {report['rows_new']:,} new rows")
+    print(f"  unchanged {report['unchanged']:,}  changed {report['changed']:,}  "
+          f"added {report['added']:,}  removed {report['removed']:,}")
+
+    for column in report["columns_added"]:
+        print(f"  COLUMN ADDED    {column}")
+    for column in report["columns_removed"]:
+        print(f"  COLUMN REMOVED  {column}")
+    for column, (old_dtype, new_dtype) in report["dtype_changes"].items():
+        print(f"  DTYPE           {column}: {old_dtype} -> {new_dtype}")
+
+    for column, n_changed in sorted(report["column_changes"].items(), key=lambda kv: -kv[1]):
+        print(f"  {column}: {n_changed:,} rows changed")
+        for sample in report["samples"][column]:
+            print(f"      {sample}")
+
+
+def main(argv=None):
+
+    arg_parser = argparse.ArgumentParser(description="Row-level diff of two cleaned BRFSS datasets.")
+    arg_parser.add_argument("old_path", type=Path)
+    arg_parser.add_argument("new_path", type=Path)
+    arg_parser.add_argument("--key", help="Comma-separated record key columns; rows are aligned by position if omitted")
+    arg_parser.add_argument("--samples", type=int, default=SAMPLE_SIZE, help="Sample diffs to show per column")
+    arg_parser.add_argument("--json", type=Path, help="Write the full report as JSON to this path")
+    args = arg_parser.parse_args(argv)
+
+    key = [c for c in args.key.split(",") if c] if args.key else None
+    start_time = time.perf_counter()
+
+    try:
+        report = diff_datasets(args.old_path, args.new_path, key, args.samples)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+
+    duration = time.perf_counter() - start_time
+    print(f"[SUCCESS] Compared {args.old_path.name} and {args.new_path.name} in {duration:.2f} seconds.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
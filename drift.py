@@ -0,0 +1,227 @@
+import re
+import ast
+import sys
+import json
+import time
+import argparse
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from codebook import find_codebook, load_codebook
+
+LABEL_MATCH_THRESHOLD = 0.8
+
+# Trailing version digits BRFSS bumps when a question changes: PRIMINS1 -> PRIMINS2
+NAME_STEM_PATTERN = re.compile(r"^(.*?)(\d*)$")
+
+
+def name_stem(name: str):
+    return NAME_STEM_PATTERN.match(name.upper()).group(1)
+
+
+def label_similarity(a: str, b: str):
+    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+
+def read_raw_header(year_dir: Path):
+
+    csv_files = sorted(year_dir.glob("*_BRFSS_RAW.csv"))
+
+    if not csv_files:
+        return None
+
+    with open(csv_files[0], encoding="latin1") as f:
+        return [c.strip().strip('"') for c in f.readline().split(",")]
+
+
+def read_script_columns(script_path: Path):
+
+    # The `new_columns = {...}` rename dict in process_YYYY.py lists every raw
+    # column the cleaning script depends on
+    tree = ast.parse(script_path.read_text())
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "new_columns" for t in node.targets
+        ):
+            return ast.literal_eval(node.value)
+
+    return None
+
+
+def match_renames(removed, added, old_codebook, new_codebook):
+
+    renames = {}
+    candidates = set(added)
+
+    # Pass 1: same name stem (PRIMINS1 -> PRIMINS2, AVEDRNK3 -> AVEDRNK4)
+    by_stem = {}
+    for name in candidates:
+        by_stem.setdefault(name_stem(name), []).append(name)
+
+    for name in removed:
+        matches = [m for m in by_stem.get(name_stem(name), []) if m in candidates]
+        if len(matches) == 1:
+            renames[name] = {"name": matches[0], "reason": "stem", "score": 1.0}
+            candidates.discard(matches[0])
+
+    # Pass 2: identical label, then fuzzy label within the same section
+    by_label = {}
+    for name in candidates:
+        variable = new_codebook.get(name)
+        if variable is not None:
+            by_label.setdefault(variable.get("label", "").lower(), []).append(name)
+
+    for name in removed:
+        if name in renames or old_codebook.get(name) is None:
+            continue
+
+        old_variable = old_codebook[name]
+        matches = [m for m in by_label.get(old_variable.get("label", "").lower(), []) if m in candidates]
+
+        if len(matches) == 1:
+            renames[name] = {"name": matches[0], "reason": "label", "score": 1.0}
+            candidates.discard(matches[0])
+            continue
+
+        best_name, best_score = None, LABEL_MATCH_THRESHOLD
+        for candidate in candidates:
+            new_variable = new_codebook.get(candidate)
+            if new_variable is None or new_variable.get("section") != old_variable.get("section"):
+                continue
+            score = label_similarity(old_variable.get("label", ""), new_variable.get("label", ""))
+            if score >= best_score:
+                best_name, best_score = candidate, score
+
+        if best_name is not None:
+            renames[name] = {"name": best_name, "reason": "fuzzy_label", "score": round(best_score, 3)}
+            candidates.discard(best_name)
+
+    return renames
+
+
+def changed_codes(old_name, new_name, old_codebook, new_codebook):
+
+    if old_codebook.get(old_name) is None or new_codebook.get(new_name) is None:
+        return None
+
+    old_codes = set(old_codebook.codes(old_name))
+    new_codes = set(new_codebook.codes(new_name))
+
+    if old_codes == new_codes:
+        return None
+
+    return {"removed": sorted(old_codes - new_codes), "added": sorted(new_codes - old_codes)}
+
+
+def compare_years(old_dir: Path, new_dir: Path):
+
+    old_codebook = load_codebook(find_codebook(old_dir))
+    new_codebook = load_codebook(find_codebook(new_dir))
+
+    # Prefer the raw CSV header when it exists; the codebook omits a few
+    # derived/weighting columns that are present in the data files
+    old_names = set(read_raw_header(old_dir) or old_codebook.names())
+    new_names = set(read_raw_header(new_dir) or new_codebook.names())
+
+    removed = sorted(old_names - new_names)
+    added = sorted(new_names - old_names)
+    renamed = match_renames(removed, added, old_codebook, new_codebook)
+
+    code_changes = {}
+    for name in sorted(old_names & new_names):
+        change = changed_codes(name, name, old_codebook, new_codebook)
+        if change:
+            code_changes[name] = change
+    for old_name, match in renamed.items():
+        change = changed_codes(old_name, match["name"], old_codebook, new_codebook)
+        if change:
+            code_changes[old_name] = change
+
+    renamed_targets = {m["name"] for m in renamed.values()}
+
+    return {
+        "old": old_dir.name,
+        "new": new_dir.name,
+        "removed": [n for n in removed if n not in renamed],
+        "added": [n for n in added if n not in renamed_targets],
+        "renamed": renamed,
+        "changed_codes": code_changes,
+    }
+
+
+def draft_mapping(report, columns):
+
+    # Translate an old-year `new_columns` rename dict into the new year's names
+    removed = set(report["removed"])
+    mapping, dropped = {}, []
+
+    for raw_name, clean_name in columns.items():
+        if raw_name in report["renamed"]:
+            mapping[report["renamed"][raw_name]["name"]] = clean_name
+        elif raw_name in removed:
+            dropped.append(raw_name)
+        else:
+            mapping[raw_name] = clean_name
+
+    return mapping, dropped
+
+
+def print_report(report):
+
+    print(f"[INFO] {report['old']} -> {report['new']}: {len(report['removed'])} removed, "
+          f"{len(report['added'])} added, {len(report['renamed'])} renamed, "
+          f"{len(report['changed_codes'])} with changed codes")
+
+    for old_name, match in sorted(report["renamed"].items()):
+        print(f"  RENAMED  {old_name} -> {match['name']} ({match['reason']}, {match['score']})")
+    for name in report["removed"]:
+        print(f"  REMOVED  {name}")
+    for name in report["added"]:
+        print(f"  ADDED    {name}")
+    for name, change in sorted(report["changed_codes"].items()):
+        print(f"  CODES    {name}: -{change['removed']} +{change['added']}")
+
+
+def main(argv=None):
+
+    arg_parser = argparse.ArgumentParser(description="Report variable drift between two BRFSS survey years.")
+    arg_parser.add_argument("old_dir", type=Path, help="Year directory of the older survey, e.g. 2023")
+    arg_parser.add_argument("new_dir", type=Path, help="Year directory of the newer survey, e.g. 2024")
+    arg_parser.add_argument("--script", type=Path, help="Older year's process_YYYY.py to draft a new mapping from")
+    arg_parser.add_argument("--json", type=Path, help="Write the full report as JSON to this path")
+    args = arg_parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+
+    try:
+        report = compare_years(args.old_dir, args.new_dir)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    print_report(report)
+
+    if args.script:
+        columns = read_script_columns(args.script)
+        if columns is None:
+            print(f"[ERROR] No `new_columns` dict found in {args.script}", file=sys.stderr)
+            return 1
+        mapping, dropped = draft_mapping(report, columns)
+        report["draft_mapping"] = mapping
+        report["dropped_columns"] = dropped
+        print(f"[INFO] Draft mapping for {report['new']} (dropped: {', '.join(dropped) or 'none'}):")
+        print(json.dumps(mapping, indent=4))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    duration = time.perf_counter() - start_time
+    print(f"[SUCCESS] Compared {report['old']} and {report['new']} in {duration:.2f} seconds.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
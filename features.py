@@ -0,0 +1,258 @@
+import sys
+import json
+import time
+import inspect
+import hashlib
+import argparse
+import polars as pl
+from pathlib import Path
+
+STORE_VERSION = 1
+
+# WHO adult BMI classification; each break is the inclusive lower bound of the next class
+BMI_CLASS_labels = {
+    0: 'Underweight',
+    1: 'Normal',
+    2: 'Overweight',
+    3: 'Obese Class I',
+    4: 'Obese Class II',
+    5: 'Obese Class III'
+}
+
+BMI_CLASS_BREAKS = [18.5, 25.0, 30.0, 35.0, 40.0]
+
+
+# Every feature is a function of the available cleaned columns, plus the
+# parameters declared in FEATURES, returning a Polars expression. The function's
+# source, its parameters, and any module-level constants and helpers it uses form
+# the cache key, so editing any of them invalidates the materialized sidecar
+
+def bmi_class(columns, breaks):
+
+    # 0-5, see BMI_CLASS_labels: the number of class breaks at or below BMI
+    return sum((pl.col("BMI") >= b).cast(pl.Int64) for b in breaks)
+
+
+def cardiometabolic(columns):
+
+    # 1 if any of stroke, heart disease or hypertension (HIGH_BP = 3) was
+    # reported. HIGH_BP is only asked in 2023; 2024 uses stroke and heart disease.
+    # Null when no condition is reported and at least one answer is missing
+    conditions = [pl.col("HAD_STROKE") == 1, pl.col("HAD_HEARTDISEASE") == 1]
+    if "HIGH_BP" in columns:
+        conditions.append(pl.col("HIGH_BP") == 3)
+
+    return pl.any_horizontal(conditions).cast(pl.Int64)
+
+
+def diabetic(columns):
+
+    # 1: Diabetic, 0: Non-, pre- or gestational-only diabetic
+    return (pl.col("DIABETES_STATUS") == 3).cast(pl.Int64)
+
+
+def diabetes_binary(columns):
+
+    # 1: Diabetic or pre-diabetic, 0: Non- or gestational-only diabetic
+    return pl.col("DIABETES_STATUS").is_in([1, 3]).cast(pl.Int64)
+
+
+FEATURES = {
+    "BMI_CLASS": (bmi_class, {"breaks": BMI_CLASS_BREAKS}),
+    "CARDIOMETABOLIC": (cardiometabolic, {}),
+    "DIABETIC": (diabetic, {}),
+    "DIABETES_BINARY": (diabetes_binary, {}),
+}
+
+
+def definition_hash(name: str):
+
+    function, params = FEATURES[name]
+
+    params = json.dumps(params, sort_keys=True, default=repr)
+    constants = json.dumps(referenced_constants(function), sort_keys=True, default=repr)
+
+    return hashlib.sha256(f"{STORE_VERSION}:{name}:{function_source(function)}:{params}:{constants}".encode()).hexdigest()[:16]
+
+
+def function_source(function):
+
+    # Features registered from a REPL have no source file; fall back to the bytecode
+    try:
+        return inspect.getsource(function)
+    except OSError:
+        return f"{function.__code__.co_code.hex()}:{function.__code__.co_consts!r}:{function.__code__.co_names!r}"
+
+
+def referenced_constants(function, seen=None):
+
+    # Module-level values the function reads (including inside nested
+    # comprehensions), and the source of helper functions from the same module
+    # that it calls, followed recursively, so that editing either invalidates
+    # the sidecar. Imported modules and library functions are not followed:
+    # upgrading polars does not rebuild anything
+    seen = seen if seen is not None else {function}
+    names, codes = set(), [function.__code__]
+
+    while codes:
+        code = codes.pop()
+        names.update(code.co_names)
+        codes.extend(c for c in code.co_consts if inspect.iscode(c))
+
+    found = {}
+
+    for n in sorted(names):
+        value = function.__globals__.get(n)
+        if inspect.isfunction(value) and value.__module__ == function.__module__:
+            if value not in seen:
+                seen.add(value)
+                found[n] = {"source": function_source(value), "references": referenced_constants(value, seen)}
+        elif n in function.__globals__ and not inspect.ismodule(value) and not callable(value):
+            found[n] = value
+
+    return found
+
+
+def feature_expr(name: str, columns):
+
+    function, params = FEATURES[name]
+    return function(columns, **params).alias(name)
+
+
+def source_fingerprint(path: Path):
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class FeatureStore:
+
+    def __init__(self, source: Path):
+
+        self.source = Path(source)
+        self.store_dir = self.source.with_name(self.source.name + ".features")
+        self.manifest_path = self.store_dir / "manifest.json"
+
+    def scan_source(self):
+        return pl.scan_parquet(self.source) if self.source.suffix == ".parquet" else pl.scan_csv(self.source)
+
+    def load_manifest(self):
+
+        if self.manifest_path.exists():
+            return json.loads(self.manifest_path.read_text())
+
+        return {"features": {}}
+
+    def stale(self, names, manifest):
+
+        # A sidecar is reused only if it was built from this exact source file
+        # by this exact definition
+        fingerprint = source_fingerprint(self.source)
+        entries = manifest["features"]
+
+        return [
+            name for name in names
+            if name not in entries
+            or entries[name]["definition"] != definition_hash(name)
+            or entries[name]["source"] != fingerprint
+            or not (self.store_dir / entries[name]["file"]).exists()
+        ]
+
+    def materialize(self, names):
+
+        # Every missing feature comes out of one scan of the source
+        unknown = [name for name in names if name not in FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown features: {', '.join(unknown)}; expected one of {', '.join(FEATURES)}")
+
+        fingerprint = source_fingerprint(self.source)
+        lf = self.scan_source()
+        columns = lf.collect_schema().names()
+
+        computed = lf.select([feature_expr(name, columns) for name in names]).collect()
+
+        self.store_dir.mkdir(exist_ok=True)
+        manifest = self.load_manifest()
+
+        for name in names:
+            key = definition_hash(name)
+            file_name = f"{name}-{key}.arrow"
+
+            tmp_path = self.store_dir / (file_name + ".tmp")
+            computed.select(name).write_ipc(tmp_path, compression="uncompressed")
+            tmp_path.replace(self.store_dir / file_name)
+
+            previous = manifest["features"].get(name)
+            if previous and previous["file"] != file_name:
+                (self.store_dir / previous["file"]).unlink(missing_ok=True)
+
+            manifest["features"][name] = {"file": file_name, "definition": key, "source": fingerprint}
+
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2))
+        tmp_path.replace(self.manifest_path)
+
+        return manifest
+
+    def get(self, names=None):
+
+        # Feature columns in source row order: computed on first request,
+        # memory-mapped from the sidecars after that
+        names = list(names or FEATURES)
+        manifest = self.load_manifest()
+        missing = self.stale(names, manifest)
+
+        if missing:
+            print(f"[INFO] Materializing {', '.join(missing)} for {self.source.name}")
+            manifest = self.materialize(missing)
+
+        return pl.concat([
+            pl.read_ipc(self.store_dir / manifest["features"][name]["file"], memory_map=True, rechunk=False)
+            for name in names
+        ], how="horizontal")
+
+    def with_features(self, df: pl.DataFrame, names=None):
+        return df.hstack(self.get(names))
+
+
+def main(argv=None):
+
+    arg_parser = argparse.ArgumentParser(description="Materialize and inspect derived features of a cleaned BRFSS dataset.")
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="List the registered features")
+
+    build_parser = subparsers.add_parser("build", help="Compute any missing or stale feature sidecars")
+    build_parser.add_argument("sources", nargs="+", type=Path, help="Cleaned CSV or Parquet files, e.g. 2023/2023_BRFSS_CLEANED.csv")
+    build_parser.add_argument("--feature", dest="features", action="append", choices=list(FEATURES), help="May be repeated (default: all)")
+
+    args = arg_parser.parse_args(argv)
+
+    if args.command == "list":
+        for name, (function, params) in FEATURES.items():
+            print(f"{name}: {function.__name__}({', '.join(f'{k}={v}' for k, v in params.items())}) ({definition_hash(name)})")
+        return 0
+
+    start_time = time.perf_counter()
+
+    for source in args.sources:
+        store = FeatureStore(source)
+        names = args.features or list(FEATURES)
+
+        try:
+            stale = store.stale(names, store.load_manifest())
+            if stale:
+                store.materialize(stale)
+        except (FileNotFoundError, ValueError, pl.exceptions.ColumnNotFoundError) as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            return 1
+
+        print(f"[INFO] {source.name}: {len(stale)} built, {len(names) - len(stale)} up to date")
+
+    duration = time.perf_counter() - start_time
+    print(f"[SUCCESS] Checked {len(args.sources)} datasets in {duration:.2f} seconds.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
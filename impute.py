@@ -0,0 +1,183 @@
+import sys
+import time
+import argparse
+import numpy as np
+import polars as pl
+from pathlib import Path
+
+STRATA = ["YEAR", "SEX", "AGE"]
+
+METHODS = {
+    "INCOME_LEVEL": "hotdeck",
+    "INSR_STATUS": "mode",
+    "DCTR_STATUS": "mode",
+    "COST_STATUS": "mode",
+    "CHKP_STATUS": "mode",
+    "EDUCATION_LEVEL": "mode",
+    "EMPLOYMENT_STATUS": "mode",
+    "MARITAL_STATUS": "mode",
+    "GEN_HLTH": "mode",
+    "SMOK_STATUS": "mode",
+    "EXER_STATUS": "mode",
+    "PHYS_HLTH_DAYS": "median",
+    "MENT_HLTH_DAYS": "median",
+    "POOR_HLTH_DAYS": "median",
+    "ALHL_STATUS": "median",
+}
+
+STAT_COLUMNS = ["column", "method", "value", "probability"]
+INDICATOR_SUFFIX = "_IMPUTED"
+SEED = 2023
+
+
+def fit_imputation(df: pl.DataFrame, methods=METHODS, strata=STRATA):
+
+    # Every statistic for every column comes out of a single group_by pass
+    methods = {c: m for c, m in methods.items() if c in df.columns}
+    aggregations = []
+
+    for column, method in methods.items():
+        values = pl.col(column).drop_nulls()
+        if method == "median":
+            # The nearest observed value rather than an interpolated midpoint, so
+            # day counts are filled with a count that actually occurs
+            aggregations.append(values.quantile(0.5, interpolation="nearest").cast(pl.Float64).alias(column))
+        elif method == "mode":
+            aggregations.append(values.mode().sort().first().cast(pl.Float64).alias(column))
+        elif method == "hotdeck":
+            aggregations.append(values.value_counts(sort=True, normalize=True).alias(column))
+        else:
+            raise ValueError(f"Unknown imputation method {method!r} for {column}")
+
+    grouped = df.group_by(strata).agg(aggregations)
+    frames = []
+
+    for column, method in methods.items():
+        stats = grouped.select(strata + [column])
+        if method == "hotdeck":
+            stats = stats.explode(column).unnest(column).rename({column: "value", "proportion": "probability"})
+        else:
+            stats = stats.rename({column: "value"}).with_columns(pl.lit(1.0).alias("probability"))
+        frames.append(stats.select(
+            *strata,
+            pl.lit(column).alias("column"),
+            pl.lit(method).alias("method"),
+            pl.col("value").cast(pl.Float64),
+            pl.col("probability").cast(pl.Float64),
+        ))
+
+    return pl.concat(frames).drop_nulls("value").sort(strata + ["column", "value"])
+
+
+def stats_strata(stats: pl.DataFrame, df: pl.DataFrame):
+
+    strata = [c for c in stats.columns if c not in STAT_COLUMNS]
+
+    # Statistics fitted on a single earlier year can be reused for a new year
+    if "YEAR" in strata and stats["YEAR"].n_unique() == 1 and not df["YEAR"].is_in(stats["YEAR"].implode()).any():
+        print(f"[INFO] Reusing {stats['YEAR'][0]} imputation statistics for YEAR {', '.join(map(str, df['YEAR'].unique().sort()))}")
+        strata.remove("YEAR")
+
+    return strata
+
+
+def fill_value(column: str, dtype):
+
+    fill = pl.col(column)
+    return (fill.round(0) if dtype.is_integer() else fill).cast(dtype)
+
+
+def apply_imputation(df: pl.DataFrame, stats: pl.DataFrame, indicators: bool = True, seed: int = SEED):
+
+    strata = stats_strata(stats, df)
+    fixed = stats.filter(pl.col("method") != "hotdeck")
+    columns = [c for c in stats["column"].unique(maintain_order=True) if c in df.columns]
+    rng = np.random.default_rng(seed)
+
+    if indicators:
+        df = df.with_columns([pl.col(c).is_null().cast(pl.Int64).alias(c + INDICATOR_SUFFIX) for c in columns])
+
+    df = df.with_row_index("__row__")
+
+    # Mode/median: one wide lookup table joined on the strata, then a single
+    # fill_null over all columns. Values are rounded before an integer cast,
+    # which would otherwise truncate a .5 median from older saved statistics
+    fixed_columns = fixed["column"].unique(maintain_order=True).to_list()
+    if fixed_columns:
+        lookup = fixed.pivot(on="column", index=strata, values="value", aggregate_function="first")
+        lookup = lookup.rename({c: c + "__fill" for c in fixed_columns})
+        df = df.join(lookup, on=strata, how="left").with_columns([
+            pl.col(c).fill_null(fill_value(c + "__fill", df.schema[c])) for c in fixed_columns
+        ]).drop([c + "__fill" for c in fixed_columns])
+
+    # Hot-deck: each missing value draws a donor value from its stratum's
+    # observed distribution, via an as-of join on the cumulative probability
+    for column in stats.filter(pl.col("method") == "hotdeck")["column"].unique(maintain_order=True):
+        if column not in df.columns:
+            continue
+
+        donors = (
+            stats.filter(pl.col("column") == column)
+            .with_columns((pl.col("probability").cum_sum().over(strata) / pl.col("probability").sum().over(strata)).alias("__cum__"))
+            .select(strata + ["__cum__", pl.col("value").alias("__fill")])
+            .sort("__cum__")
+        )
+        missing = df.filter(pl.col(column).is_null()).select(strata + ["__row__"])
+        draws = missing.with_columns(pl.Series("__cum__", rng.random(missing.height))).sort("__cum__")
+        draws = draws.join_asof(donors, on="__cum__", by=strata, strategy="forward", check_sortedness=False).select("__row__", "__fill")
+
+        df = df.join(draws, on="__row__", how="left").with_columns(
+            pl.col(column).fill_null(pl.col("__fill").cast(df.schema[column]))
+        ).drop("__fill")
+
+    return df.sort("__row__").drop("__row__")
+
+
+def impute(df: pl.DataFrame, methods=METHODS, strata=STRATA, indicators: bool = True, seed: int = SEED):
+
+    stats = fit_imputation(df, methods, strata)
+    return apply_imputation(df, stats, indicators, seed), stats
+
+
+def main(argv=None):
+
+    arg_parser = argparse.ArgumentParser(description="Impute missing values in a cleaned BRFSS dataset within strata.")
+    arg_parser.add_argument("csv_path", type=Path, help="Cleaned CSV, e.g. 2023/2023_BRFSS_CLEANED.csv")
+    arg_parser.add_argument("-o", "--output", type=Path, help="Imputed CSV (default: <name>_IMPUTED.csv)")
+    arg_parser.add_argument("--stats", type=Path, help="Apply these saved statistics instead of fitting new ones")
+    arg_parser.add_argument("--save-stats", type=Path, help="Write the fitted per-stratum statistics to this CSV")
+    arg_parser.add_argument("--strata", default=",".join(STRATA), help="Comma-separated strata columns")
+    arg_parser.add_argument("--no-indicators", action="store_true", help="Do not add <COLUMN>_IMPUTED flags")
+    arg_parser.add_argument("--seed", type=int, default=SEED)
+    args = arg_parser.parse_args(argv)
+
+    output = args.output or args.csv_path.with_name(args.csv_path.stem.replace("_CLEANED", "") + "_IMPUTED.csv")
+    start_time = time.perf_counter()
+
+    try:
+        df = pl.read_csv(args.csv_path)
+        if args.stats:
+            stats = pl.read_csv(args.stats)
+            imputed = apply_imputation(df, stats, not args.no_indicators, args.seed)
+        else:
+            strata = [c for c in args.strata.split(",") if c]
+            imputed, stats = impute(df, METHODS, strata, not args.no_indicators, args.seed)
+    except (FileNotFoundError, ValueError, pl.exceptions.ColumnNotFoundError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    if args.save_stats:
+        stats.write_csv(args.save_stats)
+
+    imputed.write_csv(output)
+
+    filled = {c: df[c].null_count() for c in stats["column"].unique(maintain_order=True) if c in df.columns}
+    duration = time.perf_counter() - start_time
+    print(f"[INFO] Filled {', '.join(f'{c}={n:,}' for c, n in filled.items() if n)}")
+    print(f"[SUCCESS] Imputed {sum(filled.values()):,} values in {output.name} in {duration:.2f} seconds.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
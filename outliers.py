@@ -0,0 +1,122 @@
+import sys
+import time
+import argparse
+import polars as pl
+from pathlib import Path
+
+COLUMNS = ["WGHT (lbs)", "HGHT (ft)", "BMI"]
+STRATA = ["SEX", "AGE"]
+
+# Scaled MAD: 1.4826 * MAD estimates the standard deviation for normal data
+MAD_SCALE = 1.4826
+MAD_THRESHOLD = 5.0
+QUANTILES = (0.001, 0.999)
+
+FLAG_SUFFIX = "_OUTLIER"
+
+
+def robust_limits(column: str, strata=STRATA, method: str = "mad", threshold: float = MAD_THRESHOLD, quantiles=QUANTILES):
+
+    # Per-stratum (low, high) limits as window expressions. The MAD limits read
+    # the `__<column>_median` helper column added by detect_outliers()
+    value = pl.col(column)
+
+    if method == "mad":
+        median = pl.col(f"__{column}_median")
+        mad = (value - median).abs().median().over(strata)
+        # A zero MAD (heaped values) would flag everything off the median
+        mad = pl.when(mad > 0).then(mad)
+        return median - threshold * MAD_SCALE * mad, median + threshold * MAD_SCALE * mad
+
+    if method == "quantile":
+        return value.quantile(quantiles[0]).over(strata), value.quantile(quantiles[1]).over(strata)
+
+    raise ValueError(f"Unknown outlier method {method!r}; expected 'mad' or 'quantile'")
+
+
+def outlier_flag(column: str, strata=STRATA, method: str = "mad", threshold: float = MAD_THRESHOLD, quantiles=QUANTILES):
+
+    low, high = robust_limits(column, strata, method, threshold, quantiles)
+
+    return (
+        pl.when(pl.col(column) < low).then(pl.lit(-1))
+        .when(pl.col(column) > high).then(pl.lit(1))
+        .otherwise(pl.lit(0))
+        .cast(pl.Int8)
+        .alias(column + FLAG_SUFFIX)
+    )
+
+
+def detect_outliers(df, columns=COLUMNS, strata=STRATA, method: str = "mad", threshold: float = MAD_THRESHOLD,
+                    quantiles=QUANTILES, action: str = "flag"):
+
+    # Flags are -1 (below), 0, 1 (above). Everything is built as one lazy query,
+    # so limits, flags, counts and the optional drop share a single scan
+    if action not in ("flag", "drop"):
+        raise ValueError(f"Unknown outlier action {action!r}; expected 'flag' or 'drop'")
+
+    lf = df.lazy()
+    columns = [c for c in columns if c in lf.collect_schema()]
+    flag_names = [c + FLAG_SUFFIX for c in columns]
+    helpers = [f"__{c}_median" for c in columns]
+
+    if method == "mad":
+        # Polars cannot nest windows, so the stratum median is materialized first
+        lf = lf.with_columns([pl.col(c).median().over(strata).alias(h) for c, h in zip(columns, helpers)])
+
+    flagged = lf.with_columns([outlier_flag(c, strata, method, threshold, quantiles) for c in columns])
+    if method == "mad":
+        flagged = flagged.drop(helpers)
+
+    counts = flagged.select(
+        [(pl.col(f) == -1).sum().alias(f"{c} low") for c, f in zip(columns, flag_names)]
+        + [(pl.col(f) == 1).sum().alias(f"{c} high") for c, f in zip(columns, flag_names)]
+        + [pl.any_horizontal([pl.col(f) != 0 for f in flag_names]).sum().alias("any")]
+    )
+
+    if action == "drop":
+        flagged = flagged.filter(pl.all_horizontal([pl.col(f) == 0 for f in flag_names])).drop(flag_names)
+
+    flagged, counts = pl.collect_all([flagged, counts])
+
+    return flagged, counts.row(0, named=True)
+
+
+def print_counts(counts, action: str):
+
+    verb = "Dropped" if action == "drop" else "Flagged"
+    rules = ", ".join(f"{rule}={n:,}" for rule, n in counts.items() if rule != "any" and n)
+    print(f"[INFO] {verb} {counts['any']:,} outlier rows ({rules or 'none'})")
+
+
+def main(argv=None):
+
+    arg_parser = argparse.ArgumentParser(description="Flag or drop height, weight and BMI outliers within SEX x AGE strata.")
+    arg_parser.add_argument("csv_path", type=Path, help="Cleaned CSV, e.g. 2023/2023_BRFSS_CLEANED.csv")
+    arg_parser.add_argument("-o", "--output", type=Path, help="Output CSV (default: overwrite the input)")
+    arg_parser.add_argument("--method", choices=["mad", "quantile"], default="mad")
+    arg_parser.add_argument("--threshold", type=float, default=MAD_THRESHOLD, help="Scaled-MAD multiple for --method mad")
+    arg_parser.add_argument("--quantiles", type=float, nargs=2, default=QUANTILES, metavar=("LOW", "HIGH"))
+    arg_parser.add_argument("--action", choices=["flag", "drop"], default="flag")
+    args = arg_parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+
+    try:
+        df, counts = detect_outliers(pl.scan_csv(args.csv_path), COLUMNS, STRATA, args.method,
+                                     args.threshold, args.quantiles, args.action)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    print_counts(counts, args.action)
+    df.write_csv(args.output or args.csv_path)
+
+    duration = time.perf_counter() - start_time
+    print(f"[SUCCESS] Checked {len(COLUMNS)} columns in {duration:.2f} seconds.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from budget import CHUNK_RESERVE, PANDAS_BASELINE, PANDAS_OVERHEAD, POLARS_BASELINE, POLARS_OVERHEAD, csv_row_bytes, format_size, parse_size, print_peak_rss, xpt_row_bytes
+from drift import read_script_columns
+
+# Nothing heavy is imported here; pandas/polars/matplotlib load in the stage
+# subprocesses, so `--help` and no-op runs start immediately
+
+BASE_DIR = Path(__file__).resolve().parent
+STAGES = ["convert", "clean", "summarize"]
+
+# Modules the cleaning scripts import; editing one re-runs every clean task
+CLEAN_MODULES = ["budget.py", "compress.py", "impute.py", "outliers.py"]
+
+
+class Task:
+
+    def __init__(self, name: str, stage: str, command, deps=(), inputs=(), outputs=(), env=None, memory: int = 0):
+        self.name = name
+        self.stage = stage
+        self.command = [str(c) for c in command]
+        self.deps = list(deps)
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.env = env or {}
+        self.memory = memory
+
+    def up_to_date(self):
+
+        # make-style: every output exists and is newer than every input.
+        # Tasks without declared outputs always run and skip work themselves
+        if not self.outputs or not all(p.exists() for p in self.outputs):
+            return False
+
+        newest_input = max((p.stat().st_mtime for p in self.inputs if p.exists()), default=0)
+        return min(p.stat().st_mtime for p in self.outputs) >= newest_input
+
+
+def run_task(task: Task, cwd: Path):
+
+    start_time = time.perf_counter()
+    result = subprocess.run(task.command, cwd=cwd, env={**os.environ, **task.env}, capture_output=True, text=True)
+
+    return result, time.perf_counter() - start_time
+
+
+def report_task(task: Task, result, duration: float):
+
+    for line in (result.stdout + result.stderr).splitlines():
+        print(f"  [{task.name}] {line}")
+
+    if result.returncode == 0:
+        print(f"[SUCCESS] {task.name} finished in {duration:.2f} seconds.")
+    else:
+        print(f"[ERROR] {task.name} failed with exit code {result.returncode}", file=sys.stderr)
+
+
+def run_graph(tasks, cwd: Path, jobs: int = 1, memory_budget: int = None, force: bool = False, dry_run: bool = False):
+
+    # Start every task whose dependencies have finished, up to `jobs` at once and,
+    # when a budget is given, up to `memory_budget` bytes of estimated peak use
+    jobs = max(jobs, 1)
+    pending = {task.name: task for task in tasks}
+    done, failed, skipped = set(), set(), set()
+    running = {}
+    memory_in_use = 0
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+
+            for name, task in list(pending.items()):
+                if any(dep in failed for dep in task.deps):
+                    print(f"[WARNING] Skipping {name}: a dependency failed", file=sys.stderr)
+                    failed.add(name)
+                    del pending[name]
+
+            ready = [task for task in pending.values() if all(dep in done for dep in task.deps)]
+
+            for task in ready:
+                if len(running) >= jobs:
+                    break
+
+                if not force and task.up_to_date():
+                    print(f"[INFO] {task.name} is up to date")
+                    done.add(task.name)
+                    skipped.add(task.name)
+                    del pending[task.name]
+                    continue
+
+                # A task larger than the whole budget still runs, but alone
+                if memory_budget and running and memory_in_use + task.memory > memory_budget:
+                    continue
+
+                del pending[task.name]
+
+                if dry_run:
+                    print(f"[INFO] Would run {task.name}: {' '.join(task.command)}")
+                    done.add(task.name)
+                    continue
+
+                print(f"[INFO] Starting {task.name}" + (f" (~{format_size(task.memory)})" if task.memory else ""))
+                running[pool.submit(run_task, task, cwd)] = task
+                memory_in_use += task.memory
+
+            if not running:
+                if pending and not any(all(dep in done for dep in t.deps) for t in pending.values()):
+                    raise RuntimeError(f"Unsatisfiable dependencies: {', '.join(pending)}")
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                task = running.pop(future)
+                memory_in_use -= task.memory
+                result, duration = future.result()
+                report_task(task, result, duration)
+                (done if result.returncode == 0 else failed).add(task.name)
+
+    return done, failed, skipped
+
+
+def find_years(base_dir: Path, years=None):
+
+    return sorted(
+        d.name for d in base_dir.iterdir()
+        if d.is_dir() and d.name.isdigit() and (not years or d.name in years)
+    )
+
+
+def estimate_memory(task: Task, memory_budget: int):
+
+    # Expected peak memory of a task, capped at the budget so that a larger
+    # task still runs, alone. Conversion then chunks to fit; cleaning cannot,
+    # and reports its estimate and actual peak against the budget
+    if task.stage == "convert":
+        nobs, row_bytes = xpt_row_bytes(task.inputs[0])
+        estimate = PANDAS_BASELINE + CHUNK_RESERVE + nobs * row_bytes * PANDAS_OVERHEAD
+    elif task.stage == "clean":
+        raw_csv_path, script_path = task.inputs[:2]
+        if raw_csv_path.exists():
+            rows, row_bytes = csv_row_bytes(raw_csv_path, list(read_script_columns(script_path) or {}) or None)
+            estimate = POLARS_BASELINE + rows * row_bytes * POLARS_OVERHEAD
+        else:
+            # The raw CSV does not exist until the convert task has run
+            estimate = memory_budget
+    else:
+        estimate = POLARS_BASELINE
+
+    return int(min(estimate, memory_budget))
+
+
+def build_tasks(base_dir: Path, years=None, checkpoint: bool = False, memory_budget: int = None):
+
+    tasks = []
+    clean_tasks = []
+
+    for year in find_years(base_dir, years):
+        year_dir = base_dir / year
+        xpt_files = [p for p in year_dir.glob('*') if p.suffix.lower() == '.xpt']
+        raw_csv_path = year_dir / f"{year}_BRFSS_RAW.csv"
+        script_path = year_dir / f"process_{year}.py"
+        deps = []
+
+        if xpt_files:
+            command = [sys.executable, base_dir / "to_csv.py", base_dir, "--year", year]
+            if checkpoint:
+                command.append("--checkpoint")
+            if memory_budget:
+                command += ["--memory-budget", memory_budget]
+            tasks.append(Task(f"convert:{year}", "convert", command, inputs=xpt_files[:1], outputs=[raw_csv_path]))
+            deps.append(f"convert:{year}")
+
+        if script_path.exists():
+            task = Task(
+                f"clean:{year}", "clean", [sys.executable, script_path], deps=deps,
+                inputs=[raw_csv_path, script_path] + [base_dir / m for m in CLEAN_MODULES], outputs=[year_dir / f"{year}_BRFSS_CLEANED.csv"],
+                env={"BRFSS_MEMORY_BUDGET": str(memory_budget)} if memory_budget else None,
+            )
+            tasks.append(task)
+            clean_tasks.append(task.name)
+
+    tasks.append(Task("summarize", "summarize", [sys.executable, base_dir / "report.py", base_dir], deps=clean_tasks))
+
+    if memory_budget:
+        for task in tasks:
+            task.memory = estimate_memory(task, memory_budget)
+
+    return tasks
+
+
+def select_stages(tasks, stages):
+
+    # Running a single stage drops edges to stages that were not requested
+    selected = [task for task in tasks if task.stage in stages]
+    names = {task.name for task in selected}
+
+    for task in selected:
+        task.deps = [dep for dep in task.deps if dep in names]
+
+    return selected
+
+
+def positive_int(text: str):
+
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+
+    return value
+
+
+def main(argv=None):
+
+    arg_parser = argparse.ArgumentParser(description="Run the BRFSS diabetes indicator pipeline.")
+    arg_parser.add_argument("command", choices=STAGES + ["all"], help="Stage to run, or `all` for the full graph")
+    arg_parser.add_argument("--base-dir", type=Path, default=BASE_DIR, help="Directory containing the YYYY/ folders")
+    arg_parser.add_argument("--year", dest="years", action="append", help="Only run this year (may be repeated)")
+    arg_parser.add_argument("-j", "--jobs", type=positive_int, default=os.cpu_count() or 1, help="Tasks to run at the same time")
+    arg_parser.add_argument("--checkpoint", action="store_true", help="Use resumable checkpointed XPT conversion")
+    arg_parser.add_argument("--force", action="store_true", help="Run tasks even if their outputs are up to date")
+    arg_parser.add_argument("--memory-budget", type=parse_size, help="Schedule tasks to fit this much memory, e.g. 8G. Conversion "
+                            "is chunked to stay under it; cleaning only reads the columns it needs and "
+                            "reports its peak, and cannot be held under the budget")
+    arg_parser.add_argument("-n", "--dry-run", action="store_true", help="Print the tasks that would run")
+    args = arg_parser.parse_args(argv)
+
+    stages = STAGES if args.command == "all" else [args.command]
+    base_dir = args.base_dir.resolve()
+    start_time = time.perf_counter()
+
+    tasks = select_stages(build_tasks(base_dir, args.years, args.checkpoint, args.memory_budget), stages)
+    done, failed, skipped = run_graph(tasks, base_dir, args.jobs, args.memory_budget, args.force, args.dry_run)
+
+    duration = time.perf_counter() - start_time
+
+    if args.memory_budget and not args.dry_run:
+        print_peak_rss(args.memory_budget, children=True)
+
+    if failed:
+        print(f"[ERROR] {len(failed)} of {len(tasks)} tasks failed: {', '.join(sorted(failed))}", file=sys.stderr)
+        return 1
+
+    if args.dry_run:
+        print(f"[INFO] Would run {len(done) - len(skipped)} tasks ({len(skipped)} up to date)")
+        return 0
+
+    print(f"[SUCCESS] Completed {len(done)} tasks in {duration:.2f} seconds.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import http.client
+import polars as pl
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+
+BASE_DIR = Path(__file__).resolve().parent
+HOST = "127.0.0.1"
+PORT = 8765
+CACHE_SIZE = 256
+
+AGGREGATIONS = {
+    "len": lambda column: pl.len(),
+    "count": lambda column: pl.col(column).count(),
+    "sum": lambda column: pl.col(column).sum(),
+    "mean": lambda column: pl.col(column).mean(),
+    "median": lambda column: pl.col(column).median(),
+    "std": lambda column: pl.col(column).std(),
+    "min": lambda column: pl.col(column).min(),
+    "max": lambda column: pl.col(column).max(),
+    "n_unique": lambda column: pl.col(column).n_unique(),
+}
+
+
+def find_sources(base_dir: Path):
+
+    return [
+        d / f"{d.name}_BRFSS_CLEANED.csv"
+        for d in sorted(base_dir.iterdir())
+        if d.is_dir() and d.name.isdigit() and (d / f"{d.name}_BRFSS_CLEANED.csv").exists()
+    ]
+
+
+def dataset_manifest(sources):
+
+    # What the loaded data was built from; any change invalidates the cache
+    return {str(path): [path.stat().st_size, path.stat().st_mtime_ns] for path in sources if path.exists()}
+
+
+def ipc_path_for(source: Path):
+    return source.with_name(source.name + ".arrow")
+
+
+def load_mapped(source: Path):
+
+    # Uncompressed Arrow IPC sidecars are memory-mapped rather than parsed, so
+    # the columns are paged in from the OS cache on demand
+    ipc_path = ipc_path_for(source)
+
+    if not ipc_path.exists() or ipc_path.stat().st_mtime < source.stat().st_mtime:
+        reader = pl.read_parquet if source.suffix == ".parquet" else pl.read_csv
+        tmp_path = ipc_path.with_name(ipc_path.name + ".tmp")
+        reader(source).write_ipc(tmp_path, compression="uncompressed")
+        tmp_path.replace(ipc_path)
+
+    return pl.read_ipc(ipc_path, memory_map=True, rechunk=False)
+
+
+def is_scalar(value):
+    return isinstance(value, (str, int, float))
+
+
+def normalize_query(query):
+
+    # Canonical form used as the cache key: filters sorted by column, scalar
+    # filters turned into [value, value] ranges, and aggregates as [op, column, ...].
+    # Anything malformed is a ValueError, which the handler returns as a 400
+    if not isinstance(query, dict):
+        raise ValueError("Query must be a JSON object")
+
+    unknown = set(query) - {"filter", "group_by", "aggregate"}
+    if unknown:
+        raise ValueError(f"Unknown query keys: {', '.join(sorted(unknown))}")
+
+    raw_filters = query.get("filter") or {}
+    if not isinstance(raw_filters, dict):
+        raise ValueError("filter must be an object of {column: value or [low, high]}")
+
+    filters = {}
+    for column, value in sorted(raw_filters.items()):
+        bounds = list(value) if isinstance(value, list) else [value, value]
+        if len(bounds) != 2 or not all(is_scalar(v) for v in bounds):
+            raise ValueError(f"Filter on {column} must be a value or a [low, high] range")
+        filters[column] = bounds
+
+    group_by = query.get("group_by") or []
+    group_by = [group_by] if isinstance(group_by, str) else group_by
+    if not isinstance(group_by, list) or not all(isinstance(c, str) for c in group_by):
+        raise ValueError("group_by must be a column name or a list of column names")
+
+    raw_aggregates = query.get("aggregate") or {"n": ["len"]}
+    if not isinstance(raw_aggregates, dict):
+        raise ValueError("aggregate must be an object of {alias: [op, column, ...]}")
+
+    aggregates = {}
+    for alias, spec in sorted(raw_aggregates.items()):
+        spec = [spec] if isinstance(spec, str) else spec
+        if not isinstance(spec, list) or not spec or not isinstance(spec[0], str) \
+                or (spec[0] != "rate" and spec[0] not in AGGREGATIONS):
+            raise ValueError(f"Unknown aggregate {alias}: {spec!r}; expected rate or one of {', '.join(AGGREGATIONS)}")
+        elif spec[0] == "rate" and (len(spec) != 3 or not isinstance(spec[1], str) or not is_scalar(spec[2])):
+            raise ValueError(f"Aggregate {alias} must be [\"rate\", column, value]")
+        elif spec[0] not in ("rate", "len") and (len(spec) != 2 or not isinstance(spec[1], str)):
+            raise ValueError(f"Aggregate {alias} must be [\"{spec[0]}\", column]")
+        aggregates[alias] = spec
+
+    return {"filter": filters, "group_by": group_by, "aggregate": aggregates}
+
+
+def aggregate_expr(alias: str, spec):
+
+    # ["rate", column, value] is the share of non-null rows where column == value
+    if spec[0] == "rate":
+        _, column, value = spec
+        return (pl.col(column) == pl.lit(value)).mean().alias(alias)
+
+    return AGGREGATIONS[spec[0]](spec[1] if len(spec) > 1 else None).alias(alias)
+
+
+def run_query(df: pl.DataFrame, query):
+
+    lf = df.lazy()
+
+    for column, (low, high) in query["filter"].items():
+        # Bounds are values, never column names: a bare string passed to
+        # is_between would be read as pl.col(string)
+        if column in df.schema and df.schema[column] != pl.String and (isinstance(low, str) or isinstance(high, str)):
+            raise ValueError(f"Filter on {column} must be numeric, got {[low, high]!r}")
+        lf = lf.filter(pl.col(column).is_between(pl.lit(low), pl.lit(high)))
+
+    aggregates = [aggregate_expr(alias, spec) for alias, spec in query["aggregate"].items()]
+
+    if query["group_by"]:
+        lf = lf.group_by(query["group_by"]).agg(aggregates).sort(query["group_by"], nulls_last=True)
+    else:
+        lf = lf.select(aggregates)
+
+    result = lf.collect()
+
+    return {"columns": result.columns, "rows": result.rows()}
+
+
+class QueryEngine:
+
+    def __init__(self, sources, cache_size: int = CACHE_SIZE):
+
+        self.sources = [Path(p) for p in sources]
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.manifest = None
+        self.df = None
+        self.hits = 0
+        self.misses = 0
+
+    def refresh(self):
+
+        # Called under the lock. A stat per source is all an unchanged dataset costs
+        manifest = dataset_manifest(self.sources)
+
+        if manifest != self.manifest:
+            frames = [load_mapped(Path(path)) for path in manifest]
+            self.df = pl.concat(frames, how="diagonal_relaxed", rechunk=False) if frames else pl.DataFrame()
+            self.manifest = manifest
+            self.cache.clear()
+            print(f"[INFO] Loaded {self.df.height:,} rows from {len(frames)} datasets")
+
+    def query(self, query):
+
+        query = normalize_query(query)
+        key = json.dumps(query, sort_keys=True)
+
+        with self.lock:
+            self.refresh()
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key], True
+            df, manifest = self.df, self.manifest
+
+        result = run_query(df, query)
+
+        with self.lock:
+            self.misses += 1
+            # Do not cache a result computed from data that was reloaded meanwhile
+            if manifest is self.manifest:
+                self.cache[key] = result
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return result, False
+
+    def status(self):
+
+        with self.lock:
+            self.refresh()
+            return {
+                "datasets": self.manifest,
+                "rows": self.df.height,
+                "schema": {name: str(dtype) for name, dtype in self.df.schema.items()},
+                "cache": {"entries": len(self.cache), "hits": self.hits, "misses": self.misses},
+            }
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+
+    engine: QueryEngine = None
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, payload):
+
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+
+        if self.path == "/status":
+            self.send_json(200, self.engine.status())
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+
+        if self.path != "/query":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        start_time = time.perf_counter()
+
+        try:
+            query = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            result, cached = self.engine.query(query)
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except pl.exceptions.PolarsError as e:
+            # Polars appends the resolved query plan; the first line is the error
+            self.send_json(400, {"error": f"{type(e).__name__}: {str(e).splitlines()[0]}"})
+            return
+
+        elapsed_ms = round((time.perf_counter() - start_time) * 1000, 3)
+        self.send_json(200, {**result, "cached": cached, "elapsed_ms": elapsed_ms})
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def request(method: str, path: str, body=None, host: str = HOST, port: int = PORT, socket_path: str = None):
+
+    connection = UnixHTTPConnection(str(socket_path)) if socket_path else http.client.HTTPConnection(host, port)
+
+    try:
+        connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                           headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        payload = json.loads(response.read())
+    finally:
+        connection.close()
+
+    if response.status != 200:
+        raise ValueError(payload.get("error", f"HTTP {response.status}"))
+
+    return payload
+
+
+def query(query, host: str = HOST, port: int = PORT, socket_path: str = None):
+
+    # Client for notebooks and reports: returns the result as a DataFrame
+    payload = request("POST", "/query", query, host, port, socket_path)
+    return pl.DataFrame(payload["rows"], schema=payload["columns"], orient="row")
+
+
+def serve(sources, host: str = HOST, port: int = PORT, socket_path: Path = None, cache_size: int = CACHE_SIZE):
+
+    engine = QueryEngine(sources, cache_size)
+    handler = type("Handler", (QueryHandler,), {"engine": engine})
+
+    with engine.lock:
+        engine.refresh()
+
+    if socket_path:
+        socket_path = Path(socket_path)
+        # Only a stale socket from an earlier run is removed, never another file
+        if socket_path.is_socket():
+            socket_path.unlink()
+        elif socket_path.exists():
+            raise FileExistsError(f"{socket_path} exists and is not a socket")
+        server = ThreadingUnixHTTPServer(str(socket_path), handler)
+        address = str(socket_path)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        address = f"http://{host}:{server.server_address[1]}"
+
+    print(f"[INFO] Serving {len(engine.sources)} datasets on {address}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path:
+            socket_path.unlink(missing_ok=True)
+
+
+def main(argv=None):
+
+    arg_parser = argparse.ArgumentParser(description="Serve group-by/filter/aggregate queries over the cleaned BRFSS data.")
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the query daemon")
+    serve_parser.add_argument("sources", nargs="*", type=Path, help="Cleaned CSV or Parquet files (default: every YYYY/YYYY_BRFSS_CLEANED.csv)")
+    serve_parser.add_argument("--base-dir", type=Path, default=BASE_DIR)
+    serve_parser.add_argument("--host", default=HOST)
+    serve_parser.add_argument("--port", type=int, default=PORT)
+    serve_parser.add_argument("--socket", type=Path, help="Listen on this Unix socket instead of TCP")
+    serve_parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="Cached query results to keep")
+
+    query_parser = subparsers.add_parser("query", help="Send a JSON query to a running daemon")
+    query_parser.add_argument("query", help='e.g. \'{"filter": {"YEAR": 2023}, "group_by": ["SEX"], "aggregate": {"diabetic": ["rate", "DIABETES_STATUS", 3]}}\'')
+    query_parser.add_argument("--host", default=HOST)
+    query_parser.add_argument("--port", type=int, default=PORT)
+    query_parser.add_argument("--socket", type=Path)
+
+    args = arg_parser.parse_args(argv)
+
+    if args.command == "serve":
+        sources = args.sources or find_sources(args.base_dir)
+        if not sources:
+            print(f"[ERROR] No cleaned datasets found in {args.base_dir}", file=sys.stderr)
+            return 1
+        try:
+            serve(sources, args.host, args.port, args.socket, args.cache_size)
+        except FileExistsError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    try:
+        payload = request("POST", "/query", json.loads(args.query), args.host, args.port, args.socket)
+    except (ValueError, OSError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    with pl.Config(tbl_rows=-1, tbl_cols=-1):
+        print(pl.DataFrame(payload["rows"], schema=payload["columns"], orient="row"))
+
+    print(f"[INFO] {'Cached' if payload['cached'] else 'Computed'} in {payload['elapsed_ms']} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
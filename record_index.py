@@ -0,0 +1,170 @@
+import io
+import csv
+import sys
+import time
+import argparse
+import numpy as np
+import polars as pl
+from pathlib import Path
+
+RECORD_KEY = ["_STATE", "SEQNO"]
+CHUNK_SIZE = 64 << 20
+
+# SEQNO is the 10-digit `YYYY` + 6-digit sequence number, unique within a
+# state, so `_STATE * 10**10 + SEQNO` is a unique int64 record key
+STATE_FACTOR = 10 ** 10
+
+INDEX_DTYPE = np.dtype([("key", "<i8"), ("offset", "<i8")])
+
+
+def record_key(state, seqno):
+    return np.asarray(state, dtype=np.int64) * STATE_FACTOR + np.asarray(seqno, dtype=np.int64)
+
+
+def index_path_for(raw_csv_path: Path):
+    return raw_csv_path.with_name(raw_csv_path.name + ".idx.npy")
+
+
+def line_offsets(raw_csv_path: Path):
+
+    # Byte offset of the start of every line, found a chunk at a time
+    offsets = [np.zeros(1, dtype=np.int64)]
+    position = 0
+
+    with open(raw_csv_path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            newlines = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == ord("\n"))
+            offsets.append(newlines.astype(np.int64) + position + 1)
+            position += len(chunk)
+
+    offsets = np.concatenate(offsets)
+
+    # The last newline closes the final row rather than starting a new one
+    return offsets[offsets < position]
+
+
+def build_index(raw_csv_path: Path, index_path: Path = None):
+
+    raw_csv_path = Path(raw_csv_path)
+    index_path = Path(index_path) if index_path else index_path_for(raw_csv_path)
+
+    keys = pl.read_csv(raw_csv_path, columns=RECORD_KEY, schema_overrides={c: pl.Float64 for c in RECORD_KEY})
+    offsets = line_offsets(raw_csv_path)[1:]
+
+    if len(offsets) != keys.height:
+        raise ValueError(f"{raw_csv_path.name} has {keys.height:,} records but {len(offsets):,} lines; "
+                         "quoted newlines are not supported")
+
+    index = np.empty(keys.height, dtype=INDEX_DTYPE)
+    index["key"] = record_key(keys["_STATE"].to_numpy(), keys["SEQNO"].to_numpy())
+    index["offset"] = offsets
+    index.sort(order="key")
+
+    if np.any(index["key"][1:] == index["key"][:-1]):
+        raise ValueError(f"Duplicate {' + '.join(RECORD_KEY)} keys in {raw_csv_path.name}")
+
+    tmp_path = index_path.with_name(index_path.name + ".tmp.npy")
+    np.save(tmp_path, index)
+    tmp_path.replace(index_path)
+
+    return index_path
+
+
+class RecordIndex:
+
+    def __init__(self, raw_csv_path: Path, index_path: Path = None):
+
+        self.raw_csv_path = Path(raw_csv_path)
+        self.index_path = Path(index_path) if index_path else index_path_for(self.raw_csv_path)
+
+        if not self.index_path.exists() or self.index_path.stat().st_mtime < self.raw_csv_path.stat().st_mtime:
+            build_index(self.raw_csv_path, self.index_path)
+
+        self.index = np.load(self.index_path, mmap_mode="r")
+        self.raw = open(self.raw_csv_path, "rb")
+        self.header = next(csv.reader([self.raw.readline().decode("latin1")]))
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def offset(self, state, seqno):
+
+        key = int(record_key(state, seqno))
+        i = int(np.searchsorted(self.index["key"], key))
+
+        if i == len(self.index) or self.index["key"][i] != key:
+            return None
+
+        return int(self.index["offset"][i])
+
+    def lookup(self, state, seqno):
+
+        offset = self.offset(state, seqno)
+
+        if offset is None:
+            return None
+
+        self.raw.seek(offset)
+        line = self.raw.readline().decode("latin1")
+        values = next(csv.reader(io.StringIO(line)))
+
+        return dict(zip(self.header, values))
+
+    def trace(self, cleaned: pl.DataFrame):
+
+        # Raw source rows for cleaned records that kept the record key
+        rows = [self.lookup(state, seqno) for state, seqno in cleaned.select(RECORD_KEY).iter_rows()]
+        return pl.DataFrame([r for r in rows if r is not None], schema=self.header, orient="row")
+
+
+def main(argv=None):
+
+    arg_parser = argparse.ArgumentParser(description="Build or query the record-key index of a raw BRFSS CSV.")
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build the _STATE + SEQNO -> byte offset index")
+    build_parser.add_argument("raw_csv_path", type=Path)
+
+    lookup_parser = subparsers.add_parser("lookup", help="Print the raw record for a _STATE + SEQNO")
+    lookup_parser.add_argument("raw_csv_path", type=Path)
+    lookup_parser.add_argument("state", type=int)
+    lookup_parser.add_argument("seqno", type=int)
+
+    args = arg_parser.parse_args(argv)
+    start_time = time.perf_counter()
+
+    try:
+        if args.command == "build":
+            index_path = build_index(args.raw_csv_path)
+            duration = time.perf_counter() - start_time
+            print(f"[SUCCESS] Indexed {args.raw_csv_path.name} to {index_path.name} in {duration:.2f} seconds.")
+            return 0
+
+        with RecordIndex(args.raw_csv_path) as index:
+            record = index.lookup(args.state, args.seqno)
+
+    except (FileNotFoundError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    if record is None:
+        print(f"[ERROR] No record with _STATE={args.state} SEQNO={args.seqno} in {args.raw_csv_path.name}", file=sys.stderr)
+        return 1
+
+    for column, value in record.items():
+        print(f"{column}: {value}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from pipeline import positive_int
+
+BASE_DIR = Path(__file__).resolve().parent
+RENDER_VERSION = 2
+
+# seaborn's "colorblind" palette, used by plot_2023.ipynb
+PALETTE = ["#0173B2", "#DE8F05", "#029E73", "#D55E00", "#CC78BC", "#CA9161", "#FBAFE4", "#949494"]
+
+DIABETES_STATUS_labels = {
+    0: 'Non-Diabetic',
+    1: 'Pre-Diabetic or Borderline Diabetic',
+    2: 'Diabetic only during pregnancy',
+    3: 'Diabetic'
+}
+
+SEX_labels = {
+    0: 'Female',
+    1: 'Male'
+}
+
+GEN_HLTH_labels = {
+    1: 'Poor',
+    2: 'Fair',
+    3: 'Good',
+    4: 'Very Good',
+    5: 'Excellent'
+}
+
+BMI_BINS = 256
+BMI_XLIM = (0, 75)
+
+
+def find_cleaned(base_dir: Path):
+
+    cleaned = {}
+
+    for subdir in sorted(d for d in base_dir.iterdir() if d.is_dir() and d.name.isdigit()):
+        csv_path = subdir / f"{subdir.name}_BRFSS_CLEANED.csv"
+        if csv_path.exists():
+            cleaned[int(subdir.name)] = csv_path
+
+    return cleaned
+
+
+def compute_aggregates(csv_path: Path):
+
+    # Everything the figures need, in one scan of the cleaned data
+    import polars as pl
+
+    lf = pl.scan_csv(csv_path).select("DIABETES_STATUS", "SEX", "GEN_HLTH", "BMI").filter(pl.col("DIABETES_STATUS").is_not_null())
+    bmi_min, bmi_max = lf.select(pl.col("BMI").min().alias("min"), pl.col("BMI").max().alias("max")).collect().row(0)
+    width = (bmi_max - bmi_min) / BMI_BINS or 1.0
+
+    # Percentages are of every response with that DIABETES_STATUS, as in
+    # plot_2023.ipynb, including responses whose hue column is null
+    totals, by_sex, by_gen_hlth, bmi = pl.collect_all([
+        lf.group_by("DIABETES_STATUS").len(),
+        lf.group_by("DIABETES_STATUS", "SEX").len(),
+        lf.drop_nulls("GEN_HLTH").group_by("DIABETES_STATUS", "GEN_HLTH").len(),
+        lf.drop_nulls("BMI").group_by(
+            "DIABETES_STATUS", ((pl.col("BMI") - bmi_min) / width).floor().clip(0, BMI_BINS - 1).cast(pl.Int64).alias("bin")
+        ).len(),
+    ])
+
+    return {
+        "totals": sorted(totals.iter_rows()),
+        "sex": sorted(by_sex.iter_rows()),
+        "gen_hlth": sorted(by_gen_hlth.iter_rows()),
+        "bmi": {"min": bmi_min, "width": width, "counts": sorted(bmi.iter_rows())},
+    }
+
+
+def annotate_bars(ax, bars, totals):
+
+    for bar, total in zip(bars, totals):
+        height = bar.get_height()
+        if height == 0:
+            continue
+        pct = 0 if total == 0 else (height / total) * 100
+        ax.text(
+            bar.get_x() + bar.get_width() / 2, height + 0.5,
+            f'{int(height)}\n({pct:.1f}%)',
+            ha='center', va='bottom', fontsize=8
+        )
+
+
+def grouped_counts(ax, rows, totals, hue_labels, legend_title):
+
+    import numpy as np
+
+    order = list(DIABETES_STATUS_labels)
+    counts = {(status, hue): n for status, hue, n in rows}
+    totals = [dict(totals).get(s, 0) for s in order]
+    width = 0.8 / len(hue_labels)
+
+    for i, (hue, label) in enumerate(hue_labels.items()):
+        x = np.arange(len(order)) - 0.4 + width * (i + 0.5)
+        heights = [counts.get((status, hue), 0) for status in order]
+        bars = ax.bar(x, heights, width, label=label, color=PALETTE[i % len(PALETTE)])
+        annotate_bars(ax, bars, totals)
+
+    ax.set_xticks(range(len(order)), labels=[DIABETES_STATUS_labels[i] for i in order])
+    ax.set_xlabel('Diabetes Status')
+    ax.set_ylabel('Count of Responses')
+    ax.legend(title=legend_title)
+
+
+def plot_sex(ax, aggregates, year):
+
+    grouped_counts(ax, aggregates["sex"], aggregates["totals"], SEX_labels, 'SEX')
+    ax.set_title(f'Diabetes Status by Sex Distribution in {year}')
+
+
+def plot_gen_hlth(ax, aggregates, year):
+
+    grouped_counts(ax, aggregates["gen_hlth"], aggregates["totals"], GEN_HLTH_labels, 'GEN_HLTH')
+    ax.set_title(f'Diabetes Status by self reported General Health Distribution in {year}')
+
+
+def plot_bmi(ax, aggregates, year):
+
+    import numpy as np
+
+    bmi = aggregates["bmi"]
+    edges = bmi["min"] + bmi["width"] * np.arange(BMI_BINS + 1)
+
+    for i, status in enumerate(DIABETES_STATUS_labels):
+        counts = np.zeros(BMI_BINS)
+        for s, b, n in bmi["counts"]:
+            if s == status:
+                counts[b] = n
+        ax.stairs(counts, edges, label=DIABETES_STATUS_labels[status], color=PALETTE[i])
+
+    ax.set_xlim(*BMI_XLIM)
+    ax.set_xticks(range(BMI_XLIM[0], BMI_XLIM[1] + 1, 5))
+    ax.set_title(f"Diabetes Status by BMI Distribution in {year}")
+    ax.set_xlabel("Body Mass Index (BMI)")
+    ax.set_ylabel("Count of Responses")
+    ax.legend(title='Diabetes Status')
+
+
+FIGURES = {
+    "diabetes_by_sex": plot_sex,
+    "diabetes_by_bmi": plot_bmi,
+    "diabetes_by_gen_hlth": plot_gen_hlth,
+}
+
+
+def render(figure: str, year: int, aggregates, out_path: Path):
+
+    # Runs in a worker process; Agg needs no display
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    with plt.style.context("seaborn-v0_8-whitegrid"):
+        fig, ax = plt.subplots(figsize=(16, 10))
+        FIGURES[figure](ax, aggregates, year)
+        fig.savefig(out_path, bbox_inches="tight")
+        plt.close(fig)
+
+    return out_path
+
+
+def fingerprint(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def build_report(base_dir: Path, out_dir: Path, formats=("png",), jobs: int = None, force: bool = False):
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() and not force else {}
+    aggregate_cache = manifest.get("aggregates", {})
+    rendered = manifest.get("figures", {})
+
+    tasks = []
+
+    for year, csv_path in find_cleaned(base_dir).items():
+        stat = csv_path.stat()
+        source = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "version": RENDER_VERSION}
+
+        # Aggregates are recomputed only when the cleaned file or this module's
+        # aggregation changes
+        cached = aggregate_cache.get(str(year))
+        if cached is None or cached["source"] != source:
+            cached = {"source": source, "aggregates": compute_aggregates(csv_path)}
+            aggregate_cache[str(year)] = cached
+
+        for figure in FIGURES:
+            key = fingerprint(RENDER_VERSION, figure, year, cached["aggregates"])
+            for fmt in formats:
+                out_path = out_dir / f"{year}_{figure}.{fmt}"
+                if rendered.get(out_path.name) == key and out_path.exists():
+                    continue
+                tasks.append((figure, year, cached["aggregates"], out_path, key))
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=jobs or min(len(tasks), os.cpu_count() or 1)) as pool:
+            futures = [(pool.submit(render, figure, year, aggregates, out_path), out_path, key)
+                       for figure, year, aggregates, out_path, key in tasks]
+            for future, out_path, key in futures:
+                future.result()
+                rendered[out_path.name] = key
+
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"aggregates": aggregate_cache, "figures": rendered}))
+    tmp_path.replace(manifest_path)
+
+    return [out_path for _, _, _, out_path, _ in tasks]
+
+
+def main(argv=None):
+
+    arg_parser = argparse.ArgumentParser(description="Render the diabetes indicator figures for every processed year.")
+    arg_parser.add_argument("base_dir", nargs="?", type=Path, default=BASE_DIR, help="Directory containing the YYYY/ folders")
+    arg_parser.add_argument("-o", "--output", type=Path, help="Output directory (default: <base_dir>/report)")
+    arg_parser.add_argument("--format", dest="formats", action="append", choices=["png", "svg"], help="May be repeated (default: png)")
+    arg_parser.add_argument("-j", "--jobs", type=positive_int, help="Worker processes (default: one per figure, up to the CPU count)")
+    arg_parser.add_argument("--force", action="store_true", help="Re-render every figure")
+    args = arg_parser.parse_args(argv)
+
+    out_dir = args.output or args.base_dir / "report"
+    start_time = time.perf_counter()
+
+    try:
+        rendered = build_report(args.base_dir, out_dir, tuple(args.formats or ["png"]), args.jobs, args.force)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    duration = time.perf_counter() - start_time
+
+    if not rendered:
+        print(f"[INFO] All figures in {out_dir} are up to date.")
+    else:
+        print(f"[SUCCESS] Rendered {len(rendered)} figures to {out_dir} in {duration:.2f} seconds.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
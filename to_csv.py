@@ -1,13 +1,21 @@
+import os
 import sys
+import json
+import shutil
+import argparse
 import warnings
 import time
 import pandas as pd
 from pathlib import Path
 
+from budget import CHUNK_RESERVE, PANDAS_BASELINE, baseline_rss, chunk_rows_for, format_size, parse_size, print_peak_rss, xpt_row_bytes
+from compress import COMPRESSION_SUFFIXES, compressed_path, open_output
+
 BASE_DIR = Path('/home/spandanjit2005/Documents/brfss-data')
+CHUNK_ROWS = 100_000
 
 
-def to_csv(xpt_path: Path, csv_path: Path):
+def to_csv(xpt_path: Path, csv_path: Path, compression: str = None, chunk_rows: int = None):
 
     file_start_time = time.perf_counter()
     print(f"[INFO] Converting {xpt_path.name}")
@@ -16,9 +24,18 @@ def to_csv(xpt_path: Path, csv_path: Path):
 
         with warnings.catch_warnings():
             warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
-            df = pd.read_sas(xpt_path, encoding='latin1')
 
-        df.to_csv(csv_path, index=False)
+            if chunk_rows:
+                # Only one chunk is held in memory at a time
+                with pd.read_sas(xpt_path, format='xport', encoding='latin1', chunksize=chunk_rows) as reader, \
+                        open_output(csv_path, compression) as f:
+                    for i, df in enumerate(reader):
+                        df.to_csv(f, index=False, header=(i == 0))
+            else:
+                df = pd.read_sas(xpt_path, encoding='latin1')
+
+                with open_output(csv_path, compression) as f:
+                    df.to_csv(f, index=False)
 
         duration = time.perf_counter() - file_start_time
         duration_minutes = int(duration) // 60
@@ -36,19 +53,184 @@ def to_csv(xpt_path: Path, csv_path: Path):
         return False
 
 
-def main(base_dir: Path = BASE_DIR):
+def parts_dir_for(csv_path: Path):
+    return csv_path.with_name(csv_path.name + '.parts')
+
+
+def source_fingerprint(path: Path):
+    stat = path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_atomic(path: Path, write):
+
+    # Write to a sibling temp file and rename into place, so readers only ever
+    # see complete files
+    tmp_path = path.with_name(path.name + '.tmp')
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_manifest(parts_dir: Path, manifest):
+
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+    write_atomic(parts_dir / 'manifest.json', write)
+
+
+def load_manifest(parts_dir: Path, fingerprint):
+
+    # Resuming is by record index, so committed chunks stay valid whatever
+    # chunk size the next run uses; only a different source invalidates them
+    manifest_path = parts_dir / 'manifest.json'
+
+    if manifest_path.exists():
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('source') == fingerprint:
+            return manifest
+        print(f"[WARNING] Source changed since last run. Restarting conversion in {parts_dir.name}", file=sys.stderr)
+
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    parts_dir.mkdir(parents=True)
+
+    return {'source': fingerprint, 'nobs': None, 'chunks': [], 'complete': False}
+
+
+def seek_records(reader, start: int):
+
+    # XPORT records are fixed width, so resuming is a seek rather than a re-read
+    if start == 0:
+        return
+
+    # The fast path relies on XportReader internals; every attribute it touches
+    # must exist, or assigning `_lines_read` would silently do nothing useful
+    if start > reader.nobs:
+        raise ValueError(f"Cannot resume at record {start:,}: the file has only {reader.nobs:,} records")
+
+    if all(hasattr(reader, a) for a in ('record_start', 'record_length', 'filepath_or_buffer', '_lines_read')):
+        reader.filepath_or_buffer.seek(reader.record_start + start * reader.record_length)
+        reader._lines_read = start
+        return
+
+    skipped = 0
+    while skipped < start:
+        skipped += len(reader.read(min(CHUNK_ROWS, start - skipped)))
+
+
+def chunk_paths(csv_path: Path):
+
+    parts_dir = parts_dir_for(csv_path)
+    manifest_path = parts_dir / 'manifest.json'
+
+    if not manifest_path.exists():
+        return []
+
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    return [parts_dir / chunk['file'] for chunk in manifest['chunks']]
+
+
+def assemble_chunks(parts_dir: Path, manifest, csv_path: Path, compression: str = None):
+
+    def write(tmp_path):
+        with open_output(tmp_path, compression) as out:
+            for i, chunk in enumerate(manifest['chunks']):
+                with open(parts_dir / chunk['file'], 'rb') as f:
+                    # Every chunk carries its own header so the parts are
+                    # readable on their own; keep only the first one
+                    if i > 0:
+                        f.readline()
+                    shutil.copyfileobj(f, out)
+
+    write_atomic(csv_path, write)
+    shutil.rmtree(parts_dir)
+
+
+def to_csv_checkpointed(xpt_path: Path, csv_path: Path, chunk_rows: int = CHUNK_ROWS, assemble: bool = True, compression: str = None):
+
+    file_start_time = time.perf_counter()
+    parts_dir = parts_dir_for(csv_path)
+
+    try:
+
+        manifest = load_manifest(parts_dir, source_fingerprint(xpt_path))
+        start = sum(chunk['rows'] for chunk in manifest['chunks'])
+
+        # Anything not recorded in the manifest is from an interrupted write
+        committed = {chunk['file'] for chunk in manifest['chunks']} | {'manifest.json'}
+        for stray in parts_dir.iterdir():
+            if stray.name not in committed:
+                stray.unlink()
+
+        if start:
+            print(f"[INFO] Resuming {xpt_path.name} from record {start:,} ({len(manifest['chunks'])} chunks committed)")
+        else:
+            print(f"[INFO] Converting {xpt_path.name} in chunks of {chunk_rows:,} records")
+
+        if not manifest['complete']:
+
+            with warnings.catch_warnings():
+                warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
+
+                with pd.read_sas(xpt_path, format='xport', encoding='latin1', chunksize=chunk_rows) as reader:
+                    manifest['nobs'] = reader.nobs
+                    seek_records(reader, start)
+
+                    for df in reader:
+                        # Chunks are indexed by record number; a mismatch means the seek went wrong
+                        if len(df) and df.index[0] != start:
+                            raise RuntimeError(f"Expected a chunk starting at record {start:,}, got {df.index[0]:,}")
+
+                        chunk_file = f"part-{len(manifest['chunks']):05d}.csv"
+                        write_atomic(parts_dir / chunk_file, lambda tmp_path: df.to_csv(tmp_path, index=False))
+
+                        manifest['chunks'].append({'file': chunk_file, 'start': start, 'rows': len(df)})
+                        start += len(df)
+                        write_manifest(parts_dir, manifest)
+
+            manifest['complete'] = True
+            write_manifest(parts_dir, manifest)
+
+        if assemble:
+            assemble_chunks(parts_dir, manifest, csv_path, compression)
+
+        duration = time.perf_counter() - file_start_time
+        duration_minutes = int(duration) // 60
+        duration_seconds = float(duration) % 60
+
+        target = csv_path.name if assemble else f"{len(manifest['chunks'])} chunks in {parts_dir.name}"
+        print(f"[SUCCESS] Converted {xpt_path.name} to {target} in {duration_minutes} minutes and {duration_seconds:.2f} seconds.")
+        return True
+
+    except FileNotFoundError:
+        print(f"[ERROR] Input file not found at {xpt_path}", file=sys.stderr)
+        return False
+
+    except Exception as e:
+        print(f"[ERROR] An unexpected error occurred while processing {xpt_path.name}: {e}", file=sys.stderr)
+        return False
+
+
+def main(base_dir: Path = BASE_DIR, checkpoint: bool = False, chunk_rows: int = CHUNK_ROWS, assemble: bool = True, compression: str = None, years=None, memory_budget: int = None):
 
     total_start_time = time.perf_counter()
     converted_count = 0
+    failed_count = 0
 
     subdirectories = sorted([
         d for d in base_dir.iterdir()
-        if d.is_dir() and d.name.isdigit()
+        if d.is_dir() and d.name.isdigit() and (not years or d.name in years)
     ])
 
     if not subdirectories:
         print("[INFO] No subdirectories found to process.")
-        return
+        return True
 
     for subdir in subdirectories:
         xpt_files = [p for p in subdir.glob('*') if p.suffix.lower() == '.xpt']
@@ -63,10 +245,39 @@ def main(base_dir: Path = BASE_DIR):
         xpt_file_path = xpt_files[0]
         dir_name = subdir.name
         csv_file_name = f"{dir_name}_BRFSS_RAW.csv"
-        csv_file_path = subdir / csv_file_name
+        csv_file_path = compressed_path(subdir / csv_file_name, compression)
+
+        # An assembled CSV has no parts directory left to resume from; do not
+        # start it over unless the XPT is newer
+        if checkpoint and assemble and csv_file_path.exists() and csv_file_path.stat().st_mtime >= xpt_file_path.stat().st_mtime:
+            print(f"[INFO] {csv_file_path.name} is up to date")
+            continue
+
+        budget_chunk_rows = None
+
+        if memory_budget:
+            # Size chunks from the XPORT header so a chunk's peak memory, on top of
+            # the interpreter and pandas, fits the budget
+            nobs, row_bytes = xpt_row_bytes(xpt_file_path)
+            baseline = baseline_rss(PANDAS_BASELINE)
+            budget_chunk_rows = chunk_rows_for(memory_budget, row_bytes, baseline=baseline)
+            if baseline + CHUNK_RESERVE >= memory_budget:
+                print(f"[WARNING] {format_size(baseline)} is in use before loading any data, leaving no room in the "
+                      f"{format_size(memory_budget)} budget; using the smallest chunks", file=sys.stderr)
+            plan = "in one pass" if budget_chunk_rows >= nobs else f"in chunks of {budget_chunk_rows:,} records"
+            print(f"[INFO] {xpt_file_path.name}: {nobs:,} records of ~{format_size(row_bytes)}, converting {plan}")
 
-        if to_csv(xpt_file_path, csv_file_path):
+        if checkpoint:
+            converted = to_csv_checkpointed(xpt_file_path, csv_file_path, budget_chunk_rows or chunk_rows, assemble, compression)
+        elif budget_chunk_rows and budget_chunk_rows < nobs:
+            converted = to_csv(xpt_file_path, csv_file_path, compression, budget_chunk_rows)
+        else:
+            converted = to_csv(xpt_file_path, csv_file_path, compression)
+
+        if converted:
             converted_count += 1
+        else:
+            failed_count += 1
 
     total_duration = time.perf_counter() - total_start_time
     total_minutes = int(total_duration)// 60
@@ -74,6 +285,21 @@ def main(base_dir: Path = BASE_DIR):
 
     print(f"[SUCCESS] Converted {converted_count} files in {total_minutes} minutes and {total_seconds:.2f} seconds.")
 
+    if memory_budget:
+        print_peak_rss(memory_budget)
+
+    return failed_count == 0
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Convert BRFSS .XPT files to CSV.")
+    parser.add_argument('base_dir', nargs='?', type=Path, default=BASE_DIR)
+    parser.add_argument('--checkpoint', action='store_true', help="Write numbered chunks with a resumable manifest")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--keep-chunks', action='store_true', help="Leave the chunk files in place instead of assembling one CSV")
+    parser.add_argument('--compression', choices=list(COMPRESSION_SUFFIXES), help="Write a compressed CSV using all cores")
+    parser.add_argument('--year', dest='years', action='append', help="Only convert this year's directory (may be repeated)")
+    parser.add_argument('--memory-budget', type=parse_size, help="Size chunks to stay under this much memory, e.g. 2G (overrides --chunk-rows)")
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.base_dir, args.checkpoint, args.chunk_rows, not args.keep_chunks, args.compression, args.years, args.memory_budget) else 1)